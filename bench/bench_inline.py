@@ -0,0 +1,47 @@
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import helpers
+from corpus import make_paragraph
+from textnode import TextNode, TextType
+
+
+def split_cascade(text: str) -> list[TextNode]:
+    nodes = [TextNode(text, TextType.TEXT)]
+    for delimiter, text_type in [(r"\*\*", TextType.BOLD), (r"\*", TextType.ITALIC), ("`", TextType.CODE)]:
+        nodes = helpers.split_nodes_delimiter(nodes, delimiter, text_type)
+    nodes = helpers.split_nodes_image(nodes)
+    return helpers.split_nodes_link(nodes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare text_to_textnodes with the old split_nodes_* cascade")
+    parser.add_argument("--words", type=int, default=2000, help="words per paragraph")
+    parser.add_argument("--paragraphs", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    paragraphs = [make_paragraph(rng, args.words) for _ in range(args.paragraphs)]
+    for paragraph in paragraphs:
+        assert helpers.text_to_textnodes(paragraph) == split_cascade(paragraph)
+
+    def run(func):
+        best = min(timeit.repeat(lambda: [func(p) for p in paragraphs], number=1, repeat=args.repeat))
+        return best / len(paragraphs) * 1e6
+
+    cascade = run(split_cascade)
+    scanner = run(helpers.text_to_textnodes)
+    print(f"{args.words}-word paragraphs")
+    print(f"split cascade:  {cascade:10.1f} us/paragraph")
+    print(f"single pass:    {scanner:10.1f} us/paragraph")
+    print(f"speedup:        {cascade / scanner:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import helpers
+import main as site
+from corpus import make_document
+
+
+# Mirrors of the node classes as they were before __slots__, used as the
+# "dict" baseline.
+class DictTextNode:
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+class DictHTMLNode:
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+class DictLeafNode(DictHTMLNode):
+    def __init__(self, tag, value, props=None):
+        super().__init__(tag=tag, value=value, props=props)
+
+
+class DictParentNode(DictHTMLNode):
+    def __init__(self, tag, children, props=None):
+        super().__init__(tag=tag, children=children, props=props)
+
+
+def use_dict_nodes():
+    helpers.TextNode = DictTextNode
+    helpers.LeafNode = DictLeafNode
+    helpers.ParentNode = DictParentNode
+    site.ParentNode = DictParentNode
+
+
+def count_nodes(node) -> int:
+    return 1 + sum(count_nodes(child) for child in node.children or ())
+
+
+def measure(mode: str, blocks: int) -> dict:
+    # The interner shares leaves across the tree; it gets its own column so
+    # the other two compare the node classes alone.
+    if mode != "interned":
+        helpers.use_interner(None)
+    if mode == "dict":
+        use_dict_nodes()
+    markdown = make_document(random.Random(0), blocks)
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tree = site.markdown_to_html_node(markdown)
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    nodes = count_nodes(tree)
+    del tree
+
+    tracemalloc.start()
+    tree = site.markdown_to_html_node(markdown)
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = snapshot.statistics("filename")
+    return {
+        "mode": mode,
+        "nodes": nodes,
+        "peak_rss_kib": rss_after,
+        "rss_growth_kib": rss_after - rss_before,
+        "traced_peak_bytes": peak,
+        "retained_bytes": sum(stat.size for stat in stats),
+        "retained_blocks": sum(stat.count for stat in stats),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare node memory use with and without __slots__ and interning")
+    parser.add_argument("--blocks", type=int, default=20000, help="blocks in the synthetic document")
+    parser.add_argument("--mode", choices=["dict", "slots", "interned"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(measure(args.mode, args.blocks)))
+        return
+
+    # Each mode runs in a fresh interpreter so peak RSS is not shared.
+    results = {}
+    for mode in ["dict", "slots", "interned"]:
+        output = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--blocks", str(args.blocks)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results[mode] = json.loads(output)
+
+    print(f"{args.blocks} blocks, {results['slots']['nodes']} HTML nodes")
+    print(f"{'':20}{'dict':>14}{'slots':>14}{'interned':>14}{'ratios vs dict':>16}")
+    for key in ["peak_rss_kib", "rss_growth_kib", "traced_peak_bytes", "retained_bytes", "retained_blocks"]:
+        base, slots, interned = (results[mode][key] for mode in ["dict", "slots", "interned"])
+        ratios = "".join(f"{value / base if base else 0:>8.2f}" for value in [slots, interned])
+        print(f"{key:20}{base:>14}{slots:>14}{interned:>14}{ratios}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import argparse
+import contextlib
+import gzip
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+import main as site
+from corpus import make_document, make_site
+from searchindex import SearchIndex
+
+TEMPLATE_PATH = os.path.join(ROOT, "template.html")
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+    return time.perf_counter() - start
+
+
+def search_benchmarks(pages: int, jobs: int, changed: float, seed: int, repeat: int) -> list[tuple[str, str]]:
+    with tempfile.TemporaryDirectory() as tmp:
+        content = os.path.join(tmp, "content")
+        public = os.path.join(tmp, "public")
+        index_path = os.path.join(public, "search.json")
+        manifest_path = os.path.join(tmp, ".cache", "manifest.json")
+        sources = make_site(content, pages, seed=seed)
+
+        def full_build():
+            site.generate_pages_recursive(content, TEMPLATE_PATH, public, jobs=jobs)
+
+        def indexed_build():
+            site.use_search_index(SearchIndex(public, index_path))
+            full_build()
+
+        # The first build creates every file; the timed ones replace them alike
+        # and alternate, so drift on a busy machine hits both.
+        timed(full_build)
+        plain = indexed = float("inf")
+        try:
+            for _ in range(repeat):
+                site.use_search_index(None)
+                plain = min(plain, timed(full_build))
+                indexed = min(indexed, timed(indexed_build))
+            save = timed(site._search_index.save)
+            # Prime the manifest so the incremental run only sees the edits below.
+            timed(lambda: site.generate_pages_incremental(content, TEMPLATE_PATH, public, manifest_path, jobs))
+            site._search_index.save()
+        finally:
+            site.use_search_index(None)
+
+        loaded = SearchIndex.load(public, index_path)
+        size = compressed = 0
+        for path in loaded.files():
+            with open(path, "rb") as f:
+                data = f.read()
+            size += len(data)
+            compressed += len(gzip.compress(data))
+        load = timed(lambda: SearchIndex.load(public, index_path).load_all())
+        loaded.load_all()
+
+        rng = random.Random(seed)
+        edited = rng.sample(sources, max(1, int(pages * changed)))
+        for source in edited:
+            with open(source, "a") as f:
+                f.write("\n\n" + make_document(rng, 5).split("\n\n", 1)[1])
+
+        def incremental():
+            site.use_search_index(SearchIndex.load(public, index_path))
+            try:
+                site.generate_pages_incremental(content, TEMPLATE_PATH, public, manifest_path, jobs)
+                site._search_index.save()
+            finally:
+                site.use_search_index(None)
+
+        update = timed(incremental)
+        unchanged = timed(incremental)
+        terms = sum(len(terms) for _, terms in loaded.pages.values())
+
+    return [
+        ("full build", f"{plain:.2f} s"),
+        ("full build + index", f"{indexed:.2f} s ({indexed / plain - 1:+.1%})"),
+        ("index save", f"{save * 1000:.0f} ms"),
+        ("index load", f"{load * 1000:.0f} ms"),
+        ("index size", f"{size / 1e6:.2f} MB ({size / pages:.0f} B/page)"),
+        ("index size gzip", f"{compressed / 1e6:.2f} MB ({compressed / pages:.0f} B/page)"),
+        ("postings", f"{terms} page/term pairs"),
+        (f"incremental ({len(edited)} pages)", f"{update:.2f} s, loading and saving the index"),
+        ("incremental (no changes)", f"{unchanged:.2f} s"),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Size and build overhead of the search index")
+    parser.add_argument("--pages", type=int, default=10000, help="pages in the synthetic site (default: 10000)")
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes for the builds (default: 1)")
+    parser.add_argument("--changed", type=float, default=0.01, help="fraction of pages edited (default: 0.01)")
+    parser.add_argument("--repeat", type=int, default=2, help="full builds of each kind; the best is kept (default: 2)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for name, value in search_benchmarks(args.pages, args.jobs, args.changed, args.seed, args.repeat):
+        print(f"{name:<28}{value}")
+
+
+if __name__ == "__main__":
+    main()
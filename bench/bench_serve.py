@@ -0,0 +1,108 @@
+import argparse
+import contextlib
+import http.client
+import io
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, SRC)
+
+SERVERS = {
+    "http.server": [sys.executable, "-m", "http.server", "--directory", "{directory}", "{port}"],
+    "serve": [sys.executable, os.path.join(SRC, "serve.py"), "{directory}", "--port", "{port}", "--quiet"],
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(port: int, timeout: float = 10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with contextlib.suppress(OSError), socket.create_connection(("localhost", port), timeout=1):
+            return
+        time.sleep(0.05)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def client(port: int, urls: list[str], seconds: float, headers: dict[str, str]) -> int:
+    # One connection per client; http.client reopens it whenever the server closes it.
+    connection = http.client.HTTPConnection("localhost", port, timeout=10)
+    requests = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        connection.request("GET", urls[requests % len(urls)], headers=headers)
+        response = connection.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"GET {urls[requests % len(urls)]}: {response.status}")
+        requests += 1
+    connection.close()
+    return requests
+
+
+def load_test(command: list[str], directory: str, urls: list[str], clients: int, seconds: float, headers) -> float:
+    port = free_port()
+    args = [part.format(directory=directory, port=port) for part in command]
+    server = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_ready(port)
+        with ProcessPoolExecutor(clients) as pool:
+            # Each client runs in its own process so the load generator isn't bound by one GIL.
+            rotated = [urls[i:] + urls[:i] for i in range(clients)]
+            futures = [pool.submit(client, port, rotated[i], seconds, headers) for i in range(clients)]
+            return sum(future.result() for future in futures) / seconds
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def build_site(tmp: str, pages: int) -> tuple[str, list[str]]:
+    import assets
+    import main as site
+    from corpus import make_site
+
+    content = os.path.join(tmp, "content")
+    public = os.path.join(tmp, "public")
+    make_site(content, pages)
+    with contextlib.redirect_stdout(io.StringIO()):
+        site.generate_pages_recursive(content, os.path.join(ROOT, "template.html"), public)
+        assets.sync_static(os.path.join(ROOT, "static"), public)
+    assets.precompress(public)
+    urls = []
+    for root, _, files in os.walk(public):
+        for name in sorted(files):
+            if not name.endswith(assets.ENCODING_SUFFIXES):
+                path = "/" + os.path.relpath(os.path.join(root, name), public).replace(os.sep, "/")
+                urls.append(path.removesuffix("index.html"))
+    return public, sorted(urls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Requests per second of the preview server against http.server")
+    parser.add_argument("--pages", type=int, default=200, help="pages in the synthetic site (default: 200)")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent client processes (default: 8)")
+    parser.add_argument("--seconds", type=float, default=5, help="duration of each run (default: 5)")
+    parser.add_argument("--gzip", action="store_true", help="send Accept-Encoding: gzip, br")
+    args = parser.parse_args()
+
+    headers = {"Accept-Encoding": "gzip, br"} if args.gzip else {}
+    with tempfile.TemporaryDirectory() as tmp:
+        public, urls = build_site(tmp, args.pages)
+        for name, command in SERVERS.items():
+            rate = load_test(command, public, urls, args.clients, args.seconds, headers)
+            print(f"{name:<16}{rate:>10.0f} requests/s")
+
+
+if __name__ == "__main__":
+    main()
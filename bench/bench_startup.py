@@ -0,0 +1,62 @@
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+
+COMMANDS = {
+    "interpreter": ["-c", "pass"],
+    "import_main": ["-c", f"import sys; sys.path.insert(0, {SRC!r}); import main"],
+    "single_page": [os.path.join(SRC, "main.py"), "--page", os.path.join("content", "index.md")],
+}
+
+
+def cold_start(args: list[str], cwd: str, repeat: int) -> float:
+    # Every run is a fresh interpreter, so nothing is shared but the OS page cache.
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=cwd, check=True, stdout=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def import_times(cwd: str) -> list[tuple[int, str]]:
+    command = [sys.executable, "-X", "importtime", *COMMANDS["import_main"]]
+    stderr = subprocess.run(command, cwd=cwd, check=True, capture_output=True, text=True).stderr
+    times = []
+    for line in stderr.splitlines()[1:]:
+        _, cumulative, name = line.split("|")
+        # Depth is encoded as two spaces per level; keep main's direct imports.
+        if len(name) - len(name.lstrip()) == 3:
+            times.append((int(cumulative), name.strip()))
+    return sorted(times, reverse=True)
+
+
+def startup_benchmarks(repeat: int) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copytree(os.path.join(ROOT, "content"), os.path.join(tmp, "content"))
+        shutil.copy(os.path.join(ROOT, "template.html"), tmp)
+        return {name: cold_start(args, tmp, repeat) for name, args in COMMANDS.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start latency of the build CLI")
+    parser.add_argument("--repeat", type=int, default=10, help="runs per command; the best is kept")
+    parser.add_argument("--top", type=int, default=10, help="slowest top-level imports to list")
+    args = parser.parse_args()
+
+    for name, seconds in startup_benchmarks(args.repeat).items():
+        print(f"{name:<16}{seconds * 1000:>10.1f} ms")
+    print("\nSlowest imports made by main (cumulative):")
+    for microseconds, name in import_times(ROOT)[: args.top]:
+        print(f"{name:<16}{microseconds / 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
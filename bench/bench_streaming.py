@@ -0,0 +1,80 @@
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+import main as site
+from corpus import make_document
+from template import load_template
+
+
+def write_document(path: str, blocks: int):
+    rng = random.Random(0)
+    with open(path, "w") as f:
+        # Written in chunks so the generator itself stays small.
+        f.write(make_document(rng, 1))
+        for _ in range(blocks // 1000):
+            f.write("\n\n" + make_document(rng, 1000).split("\n\n", 1)[1])
+
+
+def run(mode: str, source: str, dest: str) -> dict:
+    template = load_template(os.path.join(ROOT, "template.html"))
+    start = time.perf_counter()
+    if mode == "streaming":
+        site.write_page(source, template, dest)
+    else:
+        with open(source, "r") as f:
+            markdown = f.read()
+        html = site.render_page(markdown, template, site.page_context(source))
+        with open(dest, "w") as f:
+            f.write(html)
+    return {
+        "mode": mode,
+        "seconds": time.perf_counter() - start,
+        "peak_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory of buffered vs streamed page generation")
+    parser.add_argument("--blocks", type=int, nargs="+", default=[10000, 40000, 160000])
+    parser.add_argument("--mode", choices=["buffered", "streaming"], help=argparse.SUPPRESS)
+    parser.add_argument("--source", help=argparse.SUPPRESS)
+    parser.add_argument("--dest", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run(args.mode, args.source, args.dest)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'blocks':>8}{'size MiB':>10}{'mode':>11}{'seconds':>9}{'peak RSS MiB':>14}")
+        for blocks in args.blocks:
+            source = os.path.join(tmp, f"{blocks}.md")
+            write_document(source, blocks)
+            size = os.path.getsize(source) / 2**20
+            outputs = []
+            for mode in ["buffered", "streaming"]:
+                dest = os.path.join(tmp, f"{blocks}-{mode}.html")
+                command = [sys.executable, __file__, "--mode", mode, "--source", source, "--dest", dest]
+                result = json.loads(subprocess.run(command, check=True, capture_output=True, text=True).stdout)
+                outputs.append(dest)
+                print(
+                    f"{blocks:>8}{size:>10.1f}{mode:>11}{result['seconds']:>9.2f}"
+                    f"{result['peak_rss_kib'] / 1024:>14.1f}"
+                )
+            with open(outputs[0], "rb") as a, open(outputs[1], "rb") as b:
+                assert a.read() == b.read(), "streamed output differs from buffered output"
+            os.remove(source)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import os
+import random
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog middle earth ring fellowship shire "
+    "gandalf rivendell mordor hobbit elves dwarves mountain river forest tower"
+).split()
+
+DEFAULT_MIX = {
+    "heading": 0.1,
+    "unordered_list": 0.15,
+    "ordered_list": 0.1,
+    "quote": 0.07,
+    "code": 0.08,
+    "paragraph": 0.5,
+}
+
+
+def make_word(rng: random.Random) -> str:
+    word = rng.choice(WORDS)
+    roll = rng.random()
+    if roll < 0.03:
+        return f"**{word}**"
+    if roll < 0.06:
+        return f"*{word}*"
+    if roll < 0.08:
+        return f"`{word}`"
+    if roll < 0.09:
+        return f"[{word}](https://example.com/{word})"
+    if roll < 0.095:
+        return f"![{word}](/images/{word}.png)"
+    if roll < 0.1:
+        # Several kinds of markup packed into one phrase.
+        return f"**{word}** *{rng.choice(WORDS)}* [`{rng.choice(WORDS)}`](/{word})"
+    return word
+
+
+def make_paragraph(rng: random.Random, words: int) -> str:
+    return " ".join(make_word(rng) for _ in range(words))
+
+
+def make_block(rng: random.Random, mix: dict[str, float] | None = None) -> str:
+    mix = mix or DEFAULT_MIX
+    kind = rng.choices(list(mix), weights=list(mix.values()))[0]
+    if kind == "heading":
+        return f"{'#' * rng.randint(2, 4)} {make_paragraph(rng, 5)}"
+    if kind == "unordered_list":
+        return "\n".join(f"* {make_paragraph(rng, 12)}" for _ in range(rng.randint(2, 6)))
+    if kind == "ordered_list":
+        return "\n".join(f"{i}. {make_paragraph(rng, 12)}" for i in range(1, rng.randint(3, 7)))
+    if kind == "quote":
+        return "\n".join(f"> {make_paragraph(rng, 15)}" for _ in range(rng.randint(1, 3)))
+    if kind == "code":
+        return "```\n" + "\n".join(f"print({rng.choice(WORDS)!r})" for _ in range(rng.randint(2, 8))) + "\n```"
+    return make_paragraph(rng, rng.randint(40, 120))
+
+
+def make_document(rng: random.Random, blocks: int, mix: dict[str, float] | None = None) -> str:
+    return "\n\n".join([f"# {make_paragraph(rng, 4)}"] + [make_block(rng, mix) for _ in range(blocks)])
+
+
+def make_site(
+    dest_dir: str, pages: int, seed: int = 0, blocks: tuple[int, int] = (10, 60), mix: dict[str, float] | None = None
+) -> list[str]:
+    rng = random.Random(seed)
+    paths = []
+    for i in range(pages):
+        path = os.path.join(dest_dir, f"section-{i % 20:02}", f"page-{i:05}", "index.md")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(make_document(rng, rng.randint(*blocks), mix))
+        paths.append(path)
+    return paths
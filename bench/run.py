@@ -0,0 +1,156 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+import helpers
+import main as site
+from bench_startup import startup_benchmarks
+from corpus import make_block, make_document, make_paragraph, make_site
+from template import load_template
+
+TEMPLATE_PATH = os.path.join(ROOT, "template.html")
+
+
+def best_of(func: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def result(name: str, amount: float, unit: str, seconds: float) -> dict:
+    return {"name": name, "unit": f"{unit}/s", "value": amount / seconds, "seconds": seconds}
+
+
+def micro_benchmarks(rng: random.Random, repeat: int) -> list[dict]:
+    results = []
+
+    paragraphs = [make_paragraph(rng, 200) for _ in range(200)]
+    size = sum(len(p) for p in paragraphs) / 1e6
+    seconds = best_of(lambda: [helpers.text_to_textnodes(p) for p in paragraphs], repeat)
+    results.append(result("text_to_textnodes", size, "MB", seconds))
+
+    documents = [make_document(rng, 200) for _ in range(10)]
+    size = sum(len(d) for d in documents) / 1e6
+    seconds = best_of(lambda: [helpers.markdown_to_blocks(d) for d in documents], repeat)
+    results.append(result("markdown_to_blocks", size, "MB", seconds))
+
+    blocks = [make_block(rng) for _ in range(5000)]
+    seconds = best_of(lambda: [helpers.block_to_block_type(b) for b in blocks], repeat)
+    results.append(result("block_to_block_type", len(blocks), "blocks", seconds))
+
+    trees = [site.markdown_to_html_node(d) for d in documents]
+    size = sum(len(t.to_html()) for t in trees) / 1e6
+    seconds = best_of(lambda: [t.to_html() for t in trees], repeat)
+    results.append(result("ParentNode.to_html", size, "MB", seconds))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sources = make_site(os.path.join(tmp, "content"), 50, seed=rng.randint(0, 2**31))
+        dest = os.path.join(tmp, "page.html")
+        template = load_template(TEMPLATE_PATH)
+
+        def generate():
+            for source in sources:
+                site.write_page(source, template, dest)
+
+        seconds = best_of(generate, repeat)
+        results.append(result("generate_page", len(sources), "pages", seconds))
+
+    return results
+
+
+def macro_benchmarks(rng: random.Random, pages: int, jobs: int, repeat: int) -> list[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        content = os.path.join(tmp, "content")
+        make_site(content, pages, seed=rng.randint(0, 2**31))
+        public = os.path.join(tmp, "public")
+
+        def build(jobs):
+            with contextlib.redirect_stdout(io.StringIO()):
+                site.generate_pages_recursive(content, TEMPLATE_PATH, public, jobs=jobs)
+
+        results.append(result("site_build", pages, "pages", best_of(lambda: build(1), repeat)))
+        if jobs != 1:
+            results.append(result(f"site_build_j{jobs}", pages, "pages", best_of(lambda: build(jobs), repeat)))
+    return results
+
+
+def startup_results(repeat: int) -> list[dict]:
+    # Latency is reported as runs per second so the regression gate treats it like throughput.
+    return [result(f"startup_{name}", 1, "runs", seconds) for name, seconds in startup_benchmarks(repeat).items()]
+
+
+def compare(results: list[dict], baseline: list[dict], threshold: float) -> list[str]:
+    previous = {entry["name"]: entry for entry in baseline}
+    failures = []
+    for entry in results:
+        old = previous.get(entry["name"])
+        if old is None:
+            continue
+        change = entry["value"] / old["value"] - 1
+        entry["change"] = change
+        if change < -threshold:
+            failures.append(f"{entry['name']}: {change:+.1%} (threshold -{threshold:.0%})")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run micro and macro benchmarks for the site generator")
+    parser.add_argument("--pages", type=int, default=200, help="pages in the synthetic site (default: 200)")
+    parser.add_argument("--jobs", type=int, default=1, help="also time a parallel build with this many workers")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark; the best is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-macro", action="store_true")
+    parser.add_argument("--skip-startup", action="store_true")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="fail when throughput drops by more than this fraction of the baseline (default: 0.1)",
+    )
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = micro_benchmarks(rng, args.repeat)
+    if not args.skip_macro:
+        results += macro_benchmarks(rng, args.pages, args.jobs, args.repeat)
+    if not args.skip_startup:
+        results += startup_results(max(args.repeat, 5))
+
+    failures = []
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            failures = compare(results, json.load(f)["results"], args.threshold)
+
+    for entry in results:
+        change = f"{entry['change']:+8.1%}" if "change" in entry else ""
+        print(f"{entry['name']:<24}{entry['value']:>14.2f} {entry['unit']:<12}{change}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"python": sys.version, "seed": args.seed, "results": results}, f, indent=1)
+
+    if failures:
+        print("Throughput regressions:", file=sys.stderr)
+        for failure in failures:
+            print(f"  {failure}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+N=${1:-4}
+pids=()
+for i in $(seq 1 "$N"); do
+    python3 src/main.py --shard "$i/$N" "${@:2}" > /dev/null &
+    pids+=($!)
+done
+for pid in "${pids[@]}"; do
+    wait "$pid" || exit 1
+done
+python3 src/main.py --merge shards/*-of-"$N"
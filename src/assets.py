@@ -0,0 +1,180 @@
+import os
+from typing import Callable, Iterable, Iterator
+
+from atomicfile import replacing
+
+FINGERPRINT_SUFFIXES = (".css", ".js", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".avif", ".woff", ".woff2")
+FINGERPRINT_LENGTH = 12
+COMPRESS_SUFFIXES = (".html", ".css", ".js", ".svg", ".json", ".xml", ".txt")
+ENCODING_SUFFIXES = (".gz", ".br")
+
+
+def copy_asset(src: str, dest: str, link: bool = False):
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    if link:
+        try:
+            with replacing(dest) as tmp_path:
+                # os.link refuses to overwrite the placeholder file.
+                os.remove(tmp_path)
+                os.link(src, tmp_path)
+        except OSError:
+            pass
+        else:
+            return
+    # Never write through an existing destination: it may be a hard link back
+    # into static/. copy2 uses sendfile on Linux and keeps the mtime that
+    # sync_static compares against.
+    import shutil
+
+    with replacing(dest) as tmp_path:
+        shutil.copy2(src, tmp_path)
+
+
+def unchanged(src: str, dest: str) -> bool:
+    try:
+        dest_stat = os.stat(dest)
+    except FileNotFoundError:
+        return False
+    src_stat = os.stat(src)
+    return src_stat.st_size == dest_stat.st_size and src_stat.st_mtime_ns == dest_stat.st_mtime_ns
+
+
+def iter_static(static_dir: str, dest_dir: str, names: dict[str, str] | None = None) -> Iterator[tuple[str, str]]:
+    for root, _, files in os.walk(static_dir):
+        for name in files:
+            src = os.path.join(root, name)
+            relative = os.path.relpath(src, static_dir)
+            if names is not None:
+                relative = names.get(relative, relative)
+            yield src, os.path.join(dest_dir, relative)
+
+
+def fingerprinted_name(relative: str, digest: str) -> str:
+    root, ext = os.path.splitext(relative)
+    return f"{root}.{digest[:FINGERPRINT_LENGTH]}{ext}"
+
+
+def fingerprint_static(static_dir: str, file_hash: Callable[[str], str]) -> dict[str, str]:
+    # Content-addressed names can be cached forever: any edit is a new URL.
+    names = {}
+    for src, relative in iter_static(static_dir, ""):
+        if relative.endswith(FINGERPRINT_SUFFIXES):
+            names[relative] = fingerprinted_name(relative, file_hash(src))
+    return names
+
+
+def asset_urls(names: dict[str, str]) -> dict[str, str]:
+    return {"/" + src.replace(os.sep, "/"): "/" + dest.replace(os.sep, "/") for src, dest in names.items()}
+
+
+def sync_asset(src: str, dest: str, link: bool = False):
+    if unchanged(src, dest):
+        return
+    print(f"Copying {src} to {dest}")
+    copy_asset(src, dest, link)
+
+
+def sync_static(static_dir: str, dest_dir: str, link: bool = False, names: dict[str, str] | None = None) -> set[str]:
+    outputs = set()
+    for src, dest in iter_static(static_dir, dest_dir, names):
+        outputs.add(dest)
+        sync_asset(src, dest, link)
+    return outputs
+
+
+def remove_output(path: str):
+    for suffix in ENCODING_SUFFIXES:
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return
+    parent = os.path.dirname(path)
+    while parent:
+        try:
+            os.rmdir(parent)
+        except OSError:
+            break
+        parent = os.path.dirname(parent)
+
+
+def prune(dest_dir: str, keep: set[str]) -> list[str]:
+    removed = []
+    for root, _, files in os.walk(dest_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            if path not in keep:
+                removed.append(path)
+    for path in removed:
+        print(f"Removing stale {path}")
+        remove_output(path)
+    return removed
+
+
+def compressed_siblings(paths: Iterable[str]) -> set[str]:
+    return {path + suffix for path in paths if path.endswith(COMPRESS_SUFFIXES) for suffix in ENCODING_SUFFIXES}
+
+
+def _encoders() -> dict[str, Callable[[bytes], bytes]]:
+    import gzip
+
+    # mtime=0 keeps the .gz bytes reproducible between builds.
+    encoders = {".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    try:
+        import brotli
+    except ImportError:
+        pass
+    else:
+        encoders[".br"] = lambda data: brotli.compress(data, quality=11)
+    return encoders
+
+
+def compress_file(path: str, encoders: dict[str, Callable[[bytes], bytes]]) -> list[str]:
+    # A sibling carrying the source's mtime is up to date.
+    st = os.stat(path)
+    stale = []
+    for suffix in encoders:
+        try:
+            if os.stat(path + suffix).st_mtime_ns == st.st_mtime_ns:
+                continue
+        except FileNotFoundError:
+            pass
+        stale.append(suffix)
+    if not stale:
+        return []
+    with open(path, "rb") as f:
+        data = f.read()
+    written = []
+    for suffix in stale:
+        with replacing(path + suffix) as tmp_path:
+            with open(tmp_path, "wb") as f:
+                f.write(encoders[suffix](data))
+            os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        written.append(path + suffix)
+    return written
+
+
+def precompress(dest_dir: str, workers: int | None = None) -> list[str]:
+    from concurrent.futures import ThreadPoolExecutor
+
+    encoders = _encoders()
+    paths = []
+    for root, _, files in os.walk(dest_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            if name.endswith(COMPRESS_SUFFIXES):
+                paths.append(path)
+            elif name.endswith(ENCODING_SUFFIXES):
+                # Siblings left behind by an output that no longer exists.
+                original = os.path.splitext(path)[0]
+                if original.endswith(COMPRESS_SUFFIXES) and not os.path.exists(original):
+                    os.remove(path)
+    # zlib and brotli release the GIL while compressing, so threads scale.
+    written = []
+    with ThreadPoolExecutor(workers) as executor:
+        for paths_written in executor.map(lambda path: compress_file(path, encoders), paths):
+            written.extend(paths_written)
+    return written
@@ -0,0 +1,61 @@
+import asyncio
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable
+
+import assets
+from atomicfile import atomic_write
+
+
+def read_source(path: str) -> str:
+    with open(path, "r") as f:
+        return f.read()
+
+
+def write_output(path: str, html: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with atomic_write(path) as f:
+        f.write(html)
+
+
+class AsyncBuilder:
+    def __init__(self, render: Callable[[str, str], str], executor: Executor, max_in_flight: int = 32):
+        # render(from_path, markdown) runs in executor; file I/O runs on a
+        # separate thread pool sized to the number of in-flight operations.
+        self.render = render
+        self.executor = executor
+        self.max_in_flight = max_in_flight
+        self.errors: list[tuple[str, str]] = []
+
+    async def build_page(self, from_path: str, dest_path: str):
+        loop = asyncio.get_running_loop()
+        # The limit covers the whole read -> render -> write pipeline so at
+        # most max_in_flight sources are held in memory at once.
+        async with self.limit:
+            try:
+                markdown = await loop.run_in_executor(self.io, read_source, from_path)
+                print(f"Generating from {from_path} to {dest_path}")
+                html = await loop.run_in_executor(self.executor, self.render, from_path, markdown)
+                await loop.run_in_executor(self.io, write_output, dest_path, html)
+            except Exception as e:
+                self.errors.append((from_path, f"{type(e).__name__}: {e}"))
+
+    async def copy_asset(self, src: str, dest: str):
+        loop = asyncio.get_running_loop()
+        async with self.limit:
+            try:
+                await loop.run_in_executor(self.io, assets.sync_asset, src, dest)
+            except OSError as e:
+                self.errors.append((src, f"{type(e).__name__}: {e}"))
+
+    async def build(self, pages: list[tuple[str, str]], static_files: list[tuple[str, str]]):
+        self.limit = asyncio.Semaphore(self.max_in_flight)
+        with ThreadPoolExecutor(self.max_in_flight) as self.io:
+            await asyncio.gather(
+                *(self.copy_asset(src, dest) for src, dest in static_files),
+                *(self.build_page(from_path, dest_path) for from_path, dest_path in pages),
+            )
+
+    def run(self, pages: list[tuple[str, str]], static_files: list[tuple[str, str]] = ()) -> list[tuple[str, str]]:
+        asyncio.run(self.build(pages, list(static_files)))
+        return self.errors
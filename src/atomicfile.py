@@ -0,0 +1,50 @@
+import contextlib
+import os
+from typing import IO, Iterator
+
+# mkstemp creates files readable only by their owner; outputs get the mode
+# open() would have given them.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _temp_file(path: str) -> tuple[int, str]:
+    # A fresh name next to path for every writer, so concurrent builds never
+    # rename each other's half-written files.
+    import tempfile
+
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory or ".")
+    os.chmod(tmp_path, 0o666 & ~_UMASK)
+    return fd, tmp_path
+
+
+def _discard(tmp_path: str):
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(tmp_path)
+
+
+@contextlib.contextmanager
+def atomic_write(path: str, mode: str = "w") -> Iterator[IO]:
+    fd, tmp_path = _temp_file(path)
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        _discard(tmp_path)
+        raise
+
+
+@contextlib.contextmanager
+def replacing(path: str) -> Iterator[str]:
+    # For writers that need a path rather than a file object (copies, links):
+    # whatever they leave at the yielded name replaces path in one step.
+    fd, tmp_path = _temp_file(path)
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        _discard(tmp_path)
+        raise
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Callable
+
+from atomicfile import atomic_write
+
+# Bump whenever block rendering changes so stale fragments are discarded.
+CACHE_VERSION = 5
+
+
+def block_key(block: str) -> str:
+    return hashlib.blake2b(block.encode(), digest_size=16).hexdigest()
+
+
+class BlockCache:
+    def __init__(self, path: str | None = None, max_size: int = 64 * 1024 * 1024):
+        self.path = path
+        self.max_size = max_size
+        self.size = 0
+        # Each entry is (html, links, text, assets) where links are the
+        # (kind, url) pairs and text the inline runs found while rendering the
+        # block, so a hit still feeds the link and search indexes. assets maps
+        # the link URLs that were rewritten to fingerprinted names to the names
+        # used, so an entry goes stale only when one of its own assets changes.
+        self.entries: OrderedDict[str, tuple[str, list, list, dict]] = OrderedDict()
+        self.new_entries: dict[str, tuple[str, list, list, dict]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path: str, max_size: int = 64 * 1024 * 1024) -> "BlockCache":
+        cache = cls(path, max_size)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return cache
+        if data.get("version") == CACHE_VERSION:
+            for key, html, links, text, assets in data["entries"]:
+                cache.store(key, (html, [tuple(link) for link in links], text, assets))
+        return cache
+
+    def save(self):
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with atomic_write(self.path) as f:
+            entries = [[key, *entry] for key, entry in self.entries.items()]
+            json.dump({"version": CACHE_VERSION, "entries": entries}, f)
+
+    def get(self, key: str, current: Callable[[tuple], bool] | None = None) -> tuple[str, list, list, dict] | None:
+        # current rejects entries rendered against a different environment.
+        entry = self.entries.get(key)
+        if entry is None or (current is not None and not current(entry)):
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def store(self, key: str, entry: tuple[str, list, list, dict]):
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old[0])
+        self.entries[key] = entry
+        self.size += len(entry[0])
+        while self.size > self.max_size and self.entries:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted[0])
+
+    def put(
+        self, key: str, html: str, links: list | None = None, text: list | None = None, assets: dict | None = None
+    ):
+        entry = (html, links or [], text or [], assets or {})
+        self.store(key, entry)
+        self.new_entries[key] = entry
+
+    def drain(self) -> tuple[dict[str, tuple[str, list, list, dict]], int, int]:
+        new_entries, hits, misses = self.new_entries, self.hits, self.misses
+        self.new_entries = {}
+        self.hits = self.misses = 0
+        return new_entries, hits, misses
+
+    def merge(self, new_entries: dict[str, tuple[str, list, list, dict]], hits: int, misses: int):
+        for key, entry in new_entries.items():
+            self.store(key, entry)
+        self.hits += hits
+        self.misses += misses
+
+    def stats(self) -> str:
+        lookups = self.hits + self.misses
+        ratio = self.hits / lookups if lookups else 0
+        entries = len(self.entries)
+        return f"Block cache: {self.hits} hits, {self.misses} misses ({ratio:.0%} hit rate), {entries} entries"
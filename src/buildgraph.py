@@ -0,0 +1,84 @@
+import json
+import os
+from typing import Iterable
+from urllib.parse import urljoin, urlsplit
+
+from atomicfile import atomic_write
+from template import Template
+
+
+class BuildGraph:
+    def __init__(self, path: str | None = None, dest_dir: str = "public", static_dir: str | None = None):
+        self.path = path
+        self.dest_dir = dest_dir
+        self.static_dir = static_dir
+        # output -> the files it was built from (the page source first), and
+        # the reverse edges used to find what an input change invalidates.
+        self.inputs: dict[str, list[str]] = {}
+        self.dependents: dict[str, set[str]] = {}
+
+    @classmethod
+    def load(cls, path: str, dest_dir: str = "public", static_dir: str | None = None) -> "BuildGraph":
+        graph = cls(path, dest_dir, static_dir)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return graph
+        for output, inputs in data["outputs"].items():
+            graph.set_inputs(output, inputs)
+        return graph
+
+    def save(self):
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with atomic_write(self.path) as f:
+            json.dump({"outputs": self.inputs}, f, indent=1, sort_keys=True)
+
+    def set_inputs(self, output: str, inputs: list[str]):
+        self.remove(output)
+        self.inputs[output] = inputs
+        for path in inputs:
+            self.dependents.setdefault(path, set()).add(output)
+
+    def remove(self, output: str):
+        for path in self.inputs.pop(output, ()):
+            outputs = self.dependents.get(path)
+            if outputs is not None:
+                outputs.discard(output)
+                if not outputs:
+                    del self.dependents[path]
+
+    def drain(self) -> dict[str, list[str]]:
+        outputs = self.inputs
+        self.inputs = {}
+        self.dependents = {}
+        return outputs
+
+    def source(self, output: str) -> str:
+        return self.inputs[output][0]
+
+    def affected(self, changed: Iterable[str]) -> set[str]:
+        outputs = set()
+        for path in changed:
+            outputs |= self.dependents.get(path, set())
+        return outputs
+
+    def static_inputs(self, dest_path: str, links: Iterable[str]) -> list[str]:
+        if self.static_dir is None:
+            return []
+        page = "/" + os.path.relpath(dest_path, self.dest_dir).replace(os.sep, "/")
+        found = []
+        for url in links:
+            parts = urlsplit(url)
+            if parts.scheme or parts.netloc or not parts.path:
+                continue
+            path = os.path.join(self.static_dir, *urljoin(page, parts.path).lstrip("/").split("/"))
+            if path not in found and os.path.isfile(path):
+                found.append(path)
+        return found
+
+    def record_page(self, source: str, template: Template, dest_path: str, links: Iterable[tuple[str, str]]):
+        urls = [url for _, url in links] + template.links
+        self.set_inputs(dest_path, [source, *template.dependencies, *self.static_inputs(dest_path, urls)])
@@ -1,9 +1,21 @@
+import functools
+import io
 import re
-from typing import Any
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
 
-from htmlnode import LeafNode, ParentNode
+from htmlnode import FrozenLeafNode, LeafNode, ParentNode
 from textnode import TextNode, TextType
 
+if TYPE_CHECKING:
+    from toc import TableOfContents
+
+_MARKDOWN_IMAGE_PATTERN = re.compile(r"\!\[(.*?)\]\((.*?)\)")
+_MARKDOWN_LINK_PATTERN = re.compile(r"\[(.*?)\]\((.*?)\)")
+_SPLIT_IMAGE_PATTERN = re.compile(r"(\!\[.*?\]\(.*?\))")
+_SPLIT_LINK_PATTERN = re.compile(r"(\[.*?\]\(.*?\))")
+_TITLE_PATTERN = re.compile(r"^#\s+(.*)")
+_delimiter_patterns: dict[str, re.Pattern] = {}
+
 
 def validate_node(node: TextNode | Any, nodes: list[TextNode]):
     if not isinstance(node, TextNode):
@@ -15,20 +27,23 @@ def validate_node(node: TextNode | Any, nodes: list[TextNode]):
 
 
 def extract_markdown_images(text: str) -> list[tuple[str, str]]:
-    return re.findall(r"\!\[(.*?)\]\((.*?)\)", text)
+    return _MARKDOWN_IMAGE_PATTERN.findall(text)
 
 
 def extract_markdown_links(text: str) -> list[tuple[str, str]]:
-    return re.findall(r"\[(.*?)\]\((.*?)\)", text)
+    return _MARKDOWN_LINK_PATTERN.findall(text)
 
 
 def split_nodes_delimiter(old_nodes: list[TextNode], delimiter: str, text_type: TextType) -> list[TextNode]:
+    pattern = _delimiter_patterns.get(delimiter)
+    if pattern is None:
+        pattern = _delimiter_patterns[delimiter] = re.compile(delimiter)
     new_nodes = []
     for node in old_nodes:
         if not validate_node(node, new_nodes):
             continue
 
-        parts = re.split(delimiter, node.text)
+        parts = pattern.split(node.text)
         for i, part in enumerate(parts):
             if not part:
                 continue
@@ -47,7 +62,7 @@ def split_nodes_image(old_nodes: list[TextNode]) -> list[TextNode]:
         if not validate_node(node, new_nodes):
             continue
 
-        parts = re.split(r"(\!\[.*?\]\(.*?\))", node.text)
+        parts = _SPLIT_IMAGE_PATTERN.split(node.text)
         for i, part in enumerate(parts):
             if not part:
                 continue
@@ -67,7 +82,7 @@ def split_nodes_link(old_nodes: list[TextNode]) -> list[TextNode]:
         if not validate_node(node, new_nodes):
             continue
 
-        parts = re.split(r"(\[.*?\]\(.*?\))", node.text)
+        parts = _SPLIT_LINK_PATTERN.split(node.text)
         for i, part in enumerate(parts):
             if not part:
                 continue
@@ -81,62 +96,253 @@ def split_nodes_link(old_nodes: list[TextNode]) -> list[TextNode]:
     return new_nodes
 
 
-def markdown_to_blocks(markdown: str) -> list[TextNode]:
-    blocks = []
-    for block in markdown.split("\n\n"):
-        block = block.strip()
-        if not block:
+class _BlockLexer:
+    def __init__(self, fences: bool = True):
+        self.fences = fences
+        self.lines: list[str] = []
+        self.content = 0
+        self.pending = 0
+        self.first = ""
+        self.last = ""
+        self.quote = self.ulist = True
+        self.olist = 1
+        self.fenced = False
+
+    def add(self, line: str):
+        if not self.content:
+            if line.isspace():
+                return
+            self.first = line.lstrip()
+            self.fenced = self.fences and self.first.startswith("```")
+            self.lines.append(self.first)
+            self.content = 1
+            self.last = self.first
+            if self.fenced and len(self.first.rstrip()) >= 6 and self.first.rstrip().endswith("```"):
+                self.fenced = False
+            return
+
+        self.lines.append(line)
+        if line.isspace():
+            self.pending += 1
+            return
+        # The previous content line and any whitespace-only lines after it
+        # are now known to sit inside the block.
+        self.check(self.last)
+        if self.pending:
+            self.quote = self.ulist = False
+            self.olist = 0
+            self.pending = 0
+        self.content += 1
+        self.last = line
+        if self.fenced and line.rstrip().endswith("```"):
+            self.fenced = False
+
+    def check(self, line: str):
+        if self.quote and not line.startswith(">"):
+            self.quote = False
+        if self.ulist and line[:2] not in ("* ", "- ", "+ "):
+            self.ulist = False
+        if self.olist:
+            number = str(self.olist)
+            if line.startswith(number) and line.startswith(". ", len(number)):
+                self.olist += 1
+            else:
+                self.olist = 0
+
+    def finish(self) -> tuple[str, str]:
+        last = self.last.rstrip()
+        self.check(last)
+        if self.pending:
+            del self.lines[-self.pending :]
+        self.lines[-1] = self.lines[-1].rstrip()
+        block = "".join(self.lines)
+
+        first = self.first if self.content > 1 else last
+        rest = first.lstrip("#")
+        if len(rest) < len(first) and rest[:1].isspace():
+            return "heading", block
+        if first.startswith("```") and last.endswith("```"):
+            return "code", block
+        if self.quote:
+            return "quote", block
+        if self.ulist:
+            return "unordered_list", block
+        if self.olist:
+            return "ordered_list", block
+        return "paragraph", block
+
+
+def iter_typed_blocks(lines: Iterable[str]) -> Iterator[tuple[str, str]]:
+    return _iter_typed_blocks(lines, True)
+
+
+def _iter_typed_blocks(lines: Iterable[str], fences: bool) -> Iterator[tuple[str, str]]:
+    lexer = _BlockLexer(fences)
+    for line in lines:
+        if line == "\n" and not lexer.fenced:
+            if lexer.content:
+                yield lexer.finish()
+            lexer = _BlockLexer(fences)
             continue
-        blocks.append(block)
-    return blocks
+        lexer.add(line)
+    if lexer.fenced:
+        # A fence that is never closed does not hold the blank lines after it:
+        # its lines split as if it had not been opened. No later fence can
+        # close in there, since any line ending in ``` would have closed it.
+        yield from _iter_typed_blocks(lexer.lines, False)
+    elif lexer.content:
+        yield lexer.finish()
 
 
-def block_to_block_type(block: str) -> str:
-    heading_match = re.match(r"^#+\s+", block)
-    if heading_match:
-        return "heading"
+def iter_blocks(lines: Iterable[str]) -> Iterator[str]:
+    for _, block in iter_typed_blocks(lines):
+        yield block
 
-    if block.startswith("```") and block.endswith("```"):
-        return "code"
 
-    lines = block.split("\n")
-    for line in lines:
-        if not line.startswith(">"):
-            break
-    else:
-        return "quote"
+def markdown_to_typed_blocks(markdown: str) -> list[tuple[str, str]]:
+    return list(iter_typed_blocks(io.StringIO(markdown)))
 
-    for line in lines:
-        if not line[:2] in ["* ", "- ", "+ "]:
-            break
-    else:
-        return "unordered_list"
 
-    for i, line in enumerate(lines, start=1):
-        if not line.startswith(f"{i}. "):
-            break
-    else:
-        return "ordered_list"
+def markdown_to_blocks(markdown: str) -> list[str]:
+    return list(iter_blocks(io.StringIO(markdown)))
 
-    return "paragraph"
+
+def block_to_block_type(block: str) -> str:
+    lexer = _BlockLexer()
+    for line in io.StringIO(block):
+        lexer.add(line)
+    if not lexer.content:
+        return "paragraph"
+    return lexer.finish()[0]
 
 
 def extract_title(markdown: str) -> str:
     try:
-        return re.match(r"^#\s+(.*)", markdown).group(1)
+        return _TITLE_PATTERN.match(markdown).group(1)
     except AttributeError:
         raise ValueError("No title found")
 
 
-def text_to_children(text):
+_link_sink: list[tuple[str, str]] | None = None
+
+
+def collect_links(sink: list[tuple[str, str]] | None) -> list[tuple[str, str]] | None:
+    global _link_sink
+    previous = _link_sink
+    _link_sink = sink
+    return previous
+
+
+def current_link_sink() -> list[tuple[str, str]] | None:
+    return _link_sink
+
+
+_text_sink: list[str] | None = None
+
+
+def collect_text(sink: list[str] | None) -> list[str] | None:
+    # Receives the plain text of every inline run as it is rendered.
+    global _text_sink
+    previous = _text_sink
+    _text_sink = sink
+    return previous
+
+
+def current_text_sink() -> list[str] | None:
+    return _text_sink
+
+
+# Plain text longer than this is rarely repeated and would only churn the table.
+INTERN_TEXT_LIMIT = 32
+
+
+def _frozen_leaf(text_type: TextType, text: str, url: str | None) -> FrozenLeafNode:
+    node = text_node_to_html_node(TextNode(text, text_type, url))
+    return FrozenLeafNode(node.tag, node.value, node.props)
+
+
+class FragmentInterner:
+    def __init__(self, max_entries: int = 16384):
+        # Identical inline fragments share one immutable, pre-rendered leaf.
+        self.leaf = functools.lru_cache(maxsize=max_entries)(_frozen_leaf)
+        self.drained = (0, 0)
+        self.merged_hits = self.merged_misses = 0
+
+    def counts(self) -> tuple[int, int]:
+        info = self.leaf.cache_info()
+        return info.hits + self.merged_hits, info.misses + self.merged_misses
+
+    def drain(self) -> tuple[int, int]:
+        info = self.leaf.cache_info()
+        hits, misses = info.hits - self.drained[0], info.misses - self.drained[1]
+        self.drained = (info.hits, info.misses)
+        return hits, misses
+
+    def merge(self, hits: int, misses: int):
+        self.merged_hits += hits
+        self.merged_misses += misses
+
+    def clear(self):
+        # Drops the entries but keeps the counts and what is left to drain.
+        info = self.leaf.cache_info()
+        self.merge(info.hits, info.misses)
+        self.drained = (self.drained[0] - info.hits, self.drained[1] - info.misses)
+        self.leaf.cache_clear()
+
+    def stats(self) -> str:
+        hits, misses = self.counts()
+        lookups = hits + misses
+        ratio = hits / lookups if lookups else 0
+        return f"Interned fragments: {hits} hits, {misses} misses ({ratio:.0%} hit rate)"
+
+
+_interner: FragmentInterner | None = FragmentInterner()
+
+
+def use_interner(interner: FragmentInterner | None) -> FragmentInterner | None:
+    global _interner
+    previous = _interner
+    _interner = interner
+    return previous
+
+
+def current_interner() -> FragmentInterner | None:
+    return _interner
+
+
+def text_to_children(text, plain_text: list[str] | None = None):
     text_nodes = text_to_textnodes(text)
+    sink = _link_sink
+    leaf = _interner.leaf if _interner is not None else None
     children = []
     for text_node in text_nodes:
-        html_node = text_node_to_html_node(text_node)
+        if plain_text is not None:
+            plain_text.append(text_node.text)
+        if sink is not None and text_node.url is not None:
+            sink.append((text_node.text_type.value, text_node.url))
+        if leaf is not None and (text_node.text_type is not TextType.TEXT or len(text_node.text) <= INTERN_TEXT_LIMIT):
+            html_node = leaf(text_node.text_type, text_node.text, text_node.url)
+        else:
+            html_node = text_node_to_html_node(text_node)
         children.append(html_node)
+    if _text_sink is not None:
+        _text_sink.append("".join([text_node.text for text_node in text_nodes]))
     return children
 
 
+_asset_urls: dict[str, str] | None = None
+
+
+def use_asset_urls(urls: dict[str, str] | None) -> dict[str, str] | None:
+    global _asset_urls
+    previous = _asset_urls
+    _asset_urls = urls
+    # Interned links and images carry the URL they were rendered with.
+    if _interner is not None:
+        _interner.clear()
+    return previous
+
+
 def text_node_to_html_node(text_node: TextNode) -> LeafNode:
     match text_node.text_type:
         case TextType.TEXT:
@@ -148,24 +354,89 @@ def text_node_to_html_node(text_node: TextNode) -> LeafNode:
         case TextType.CODE:
             return LeafNode("code", text_node.text)
         case TextType.LINK:
-            return LeafNode("a", text_node.text, {"href": text_node.url})
+            url = text_node.url if _asset_urls is None else _asset_urls.get(text_node.url, text_node.url)
+            return LeafNode("a", text_node.text, {"href": url})
         case TextType.IMAGE:
-            return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+            url = text_node.url if _asset_urls is None else _asset_urls.get(text_node.url, text_node.url)
+            return LeafNode("img", "", {"src": url, "alt": text_node.text})
         case _:
             raise ValueError(f"Unknown text type: {text_node.text_type}")
 
 
+# Inline markup in one left-to-right scan. Images and links can never contain
+# a delimiter, which is what the old split_nodes_* cascade implied by running
+# the delimiter passes first.
+_INLINE_PATTERN = re.compile(r"\*\*|\*|`|!\[([^*`\n]*?)\]\(([^*`\n]*?)\)|\[([^*`\n]*?)\]\(([^*`\n]*?)\)")
+_IMAGE_PATTERN = re.compile(r"!\[([^*`\n]*?)\]\(([^*`\n]*?)\)")
+_LINK_PATTERN = re.compile(r"\[([^*`\n]*?)\]\(([^*`\n]*?)\)")
+
+
+def _link_overlaps_image(text: str, start: int, end: int) -> int:
+    pos = text.find("![", start, end)
+    while pos != -1:
+        if _IMAGE_PATTERN.match(text, pos):
+            return pos
+        pos = text.find("![", pos + 1, end)
+    return -1
+
+
 def text_to_textnodes(text: str) -> list[TextNode]:
-    delimiters = [
-        (r"\*\*", TextType.BOLD),
-        (r"\*", TextType.ITALIC),
-        (r"`", TextType.CODE),
-    ]
-    nodes = [TextNode(text, TextType.TEXT)]
-    for delimiter, text_type in delimiters:
-        nodes = split_nodes_delimiter(nodes, delimiter, text_type)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    nodes = []
+    bold = italic = code = False
+    start = pos = 0
+
+    def flush(end: int):
+        if end > start:
+            if bold:
+                text_type = TextType.BOLD
+            elif italic:
+                text_type = TextType.ITALIC
+            elif code:
+                text_type = TextType.CODE
+            else:
+                text_type = TextType.TEXT
+            nodes.append(TextNode(text[start:end], text_type))
+
+    while (match := _INLINE_PATTERN.search(text, pos)) is not None:
+        token = match.group()
+        pos = match.end()
+        if token == "**":
+            flush(match.start())
+            bold = not bold
+            italic = code = False
+        elif token == "*":
+            if bold:
+                continue
+            flush(match.start())
+            italic = not italic
+            code = False
+        elif token == "`":
+            if bold or italic:
+                continue
+            flush(match.start())
+            code = not code
+        else:
+            if bold or italic or code:
+                continue
+            if token[0] == "!":
+                node = TextNode(match.group(1), TextType.IMAGE, match.group(2))
+            else:
+                # Images win over links that would swallow them.
+                image_start = _link_overlaps_image(text, match.start(), match.end())
+                if image_start != -1:
+                    match = _LINK_PATTERN.search(text, match.start(), image_start)
+                    if match is None:
+                        pos = image_start
+                        continue
+                    pos = match.end()
+                    node = TextNode(match.group(1), TextType.LINK, match.group(2))
+                else:
+                    node = TextNode(match.group(3), TextType.LINK, match.group(4))
+            flush(match.start())
+            nodes.append(node)
+        start = pos
+
+    flush(len(text))
     return nodes
 
 
@@ -176,7 +447,7 @@ def paragraph_to_html_node(block):
     return ParentNode("p", children)
 
 
-def heading_to_html_node(block):
+def heading_to_html_node(block, toc: "TableOfContents | None" = None):
     level = 0
     for char in block:
         if char == "#":
@@ -186,8 +457,12 @@ def heading_to_html_node(block):
     if level + 1 >= len(block):
         raise ValueError(f"invalid heading level: {level}")
     text = block[level + 1 :]
-    children = text_to_children(text)
-    return ParentNode(f"h{level}", children)
+    if toc is None:
+        return ParentNode(f"h{level}", text_to_children(text))
+    # The anchor is taken from the rendered text, without markdown syntax.
+    plain_text = []
+    children = text_to_children(text, plain_text)
+    return ParentNode(f"h{level}", children, {"id": toc.add(level, "".join(plain_text))})
 
 
 def code_to_html_node(block):
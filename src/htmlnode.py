@@ -1,4 +1,38 @@
+import functools
+from typing import Iterator, TextIO
+
+
+def escape_text(text: str) -> str:
+    # Most text has nothing to escape; "in" scans are far cheaper than replace.
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+def escape_attribute(value: str) -> str:
+    value = escape_text(value)
+    if "'" in value:
+        value = value.replace("'", "&#x27;")
+    if '"' in value:
+        value = value.replace('"', "&quot;")
+    return value
+
+
+def _serialize_props(items) -> str:
+    return " ".join([f"{k}='{escape_attribute(str(v))}'" for k, v in items])
+
+
+# Links and images repeat across a site, so their attribute strings are reused.
+_cached_props = functools.lru_cache(maxsize=4096)(_serialize_props)
+
+
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(
         self,
         tag =None,
@@ -12,18 +46,32 @@ class HTMLNode:
         self.props: dict | None = props
 
     def to_html(self) -> str:
+        return "".join(self.iter_html())
+
+    def iter_html(self) -> Iterator[str]:
         raise NotImplementedError("to_html method not implemented")
 
+    def write_html(self, stream: TextIO):
+        write = stream.write
+        for chunk in self.iter_html():
+            write(chunk)
+
     def props_to_html(self) -> str:
-        if self.props is None:
+        if not self.props:
             return ""
-        return " ".join([f"{k}='{v}'" for k, v in self.props.items()])
+        items = tuple(self.props.items())
+        try:
+            return _cached_props(items)
+        except TypeError:
+            return _serialize_props(items)
 
     def __repr__(self) -> str:
         return f"HTMLNode({self.tag}, {self.value}, children: {self.children}, {self.props})"
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag: str, value: str, props: dict | None = None):
         super().__init__(tag=tag, value=value, props=props)
 
@@ -31,26 +79,61 @@ class LeafNode(HTMLNode):
         if self.value is None:
             raise ValueError("invalid HTML: no value")
         if self.tag is None:
-            return self.value
-        return f"<{self.tag}{' ' if self.props else ''}{self.props_to_html()}>{self.value}</{self.tag}>"
+            return escape_text(self.value)
+        return f"<{self.tag}{' ' if self.props else ''}{self.props_to_html()}>{escape_text(self.value)}</{self.tag}>"
+
+    def iter_html(self) -> Iterator[str]:
+        yield self.to_html()
 
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
 
 
+class FrozenLeafNode(LeafNode):
+    __slots__ = ("html",)
+
+    def __init__(self, tag: str, value: str, props: dict | None = None):
+        super().__init__(tag, value, props)
+        self.html = super().to_html()
+
+    def to_html(self) -> str:
+        return self.html
+
+    def __repr__(self):
+        return f"FrozenLeafNode({self.tag}, {self.value}, {self.props})"
+
+
+class RawNode(LeafNode):
+    __slots__ = ()
+
+    def __init__(self, html: str):
+        super().__init__(None, html)
+
+    def to_html(self) -> str:
+        return self.value
+
+    def __repr__(self):
+        return f"RawNode({self.value})"
+
+
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag: str, children: list[HTMLNode], props: dict | None = None):
         super().__init__(tag=tag, children=children, props=props)
 
-    def to_html(self) -> str:
+    def iter_html(self) -> Iterator[str]:
         if self.tag is None:
             raise ValueError("invalid HTML: no tag")
         if not self.children:
             raise ValueError("invalid HTML: no children")
-        children_html = ""
+        yield f"<{self.tag}{' ' if self.props else ''}{self.props_to_html()}>"
         for child in self.children:
-            children_html += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+            if isinstance(child, LeafNode):
+                yield child.to_html()
+            else:
+                yield from child.iter_html()
+        yield f"</{self.tag}>"
 
     def __repr__(self):
         return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
@@ -0,0 +1,96 @@
+import json
+import os
+from urllib.parse import urljoin, urlsplit
+
+from atomicfile import atomic_write
+
+
+def normalize_url(url: str) -> str:
+    path = urlsplit(url).path or "/"
+    if path.endswith("/index.html"):
+        path = path[: -len("index.html")]
+    elif not path.endswith("/") and "." not in path.rsplit("/", 1)[-1]:
+        path += "/"
+    return path
+
+
+class LinkIndex:
+    def __init__(self, root: str, path: str | None = None):
+        self.root = root
+        self.path = path
+        # page url -> [(kind, url as written)], and resolved target -> pages.
+        self.outbound: dict[str, list[tuple[str, str]]] = {}
+        self.backlinks: dict[str, set[str]] = {}
+        # Static URLs that were written out under a fingerprinted name.
+        self.renamed: dict[str, str] = {}
+
+    @classmethod
+    def load(cls, root: str, path: str) -> "LinkIndex":
+        index = cls(root, path)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return index
+        for page, links in data["pages"].items():
+            index.set_page(page, [tuple(link) for link in links])
+        return index
+
+    def save(self):
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with atomic_write(self.path) as f:
+            json.dump({"pages": self.outbound}, f)
+
+    def drain(self) -> dict[str, list[tuple[str, str]]]:
+        pages = self.outbound
+        self.outbound = {}
+        self.backlinks = {}
+        return pages
+
+    def page_url(self, dest_path: str) -> str:
+        return normalize_url("/" + os.path.relpath(dest_path, self.root).replace(os.sep, "/"))
+
+    def resolve(self, page: str, url: str) -> str | None:
+        parts = urlsplit(url)
+        if parts.scheme or parts.netloc or not parts.path:
+            return None
+        return normalize_url(urljoin(page, parts.path))
+
+    def set_page(self, page: str, links: list[tuple[str, str]]):
+        self.remove_page(page)
+        self.outbound[page] = links
+        for _, url in links:
+            target = self.resolve(page, url)
+            if target is not None:
+                self.backlinks.setdefault(target, set()).add(page)
+
+    def remove_page(self, page: str):
+        for _, url in self.outbound.pop(page, ()):
+            target = self.resolve(page, url)
+            pages = self.backlinks.get(target)
+            if pages is not None:
+                pages.discard(page)
+                if not pages:
+                    del self.backlinks[target]
+
+    def links_from(self, page: str) -> list[tuple[str, str]]:
+        return self.outbound.get(normalize_url(page), [])
+
+    def pages_linking_to(self, target: str) -> set[str]:
+        return self.backlinks.get(normalize_url(target), set())
+
+    def exists(self, target: str) -> bool:
+        if target in self.outbound:
+            return True
+        target = self.renamed.get(target, target)
+        return os.path.isfile(os.path.join(self.root, target.lstrip("/")))
+
+    def dead_links(self) -> list[tuple[str, str]]:
+        # One check per distinct target, however many pages link to it.
+        dead = []
+        for target, pages in self.backlinks.items():
+            if not self.exists(target):
+                dead.extend((page, target) for page in sorted(pages))
+        return sorted(dead)
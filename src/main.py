@@ -1,27 +1,146 @@
-import glob
+import argparse
+import datetime
+import functools
+import io
+import itertools
 import os
-import shutil
+import sys
+from typing import TYPE_CHECKING, Iterable, Iterator, TextIO
 
+import assets
 import helpers
-from htmlnode import ParentNode
+import template as templates
+from atomicfile import atomic_write
+from htmlnode import ParentNode, RawNode, escape_attribute, escape_text
+from template import Template, load_template
 
+# The rest are imported where they are used, so that starting up (--help,
+# a single --page) only pays for what the build asks for.
+if TYPE_CHECKING:
+    from blockcache import BlockCache
+    from buildgraph import BuildGraph
+    from linkindex import LinkIndex
+    from manifest import Manifest
+    from profiling import Profiler
+    from searchindex import SearchIndex
+    from toc import TableOfContents
 
-def markdown_to_html_node(markdown: str) -> ParentNode:
+MANIFEST_PATH = os.path.join(".cache", "manifest.json")
+BLOCK_CACHE_PATH = os.path.join(".cache", "blocks.json")
+LINK_INDEX_PATH = os.path.join(".cache", "links.json")
+GRAPH_PATH = os.path.join(".cache", "graph.json")
+ASSET_HASHES_PATH = os.path.join(".cache", "assets.json")
+SEARCH_INDEX_PATH = os.path.join("public", "search.json")
+SHARD_ROOT = "shards"
+TEMPLATE_NAME = "template.html"
+
+_block_cache: "BlockCache | None" = None
+_profiler: "Profiler | None" = None
+_link_index: "LinkIndex | None" = None
+_search_index: "SearchIndex | None" = None
+_build_graph: "BuildGraph | None" = None
+_asset_names: dict[str, str] | None = None
+_asset_urls: dict[str, str] | None = None
+
+
+def use_block_cache(cache: "BlockCache | None"):
+    global _block_cache
+    _block_cache = cache
+
+
+def use_link_index(index: "LinkIndex | None"):
+    global _link_index
+    _link_index = index
+
+
+def use_search_index(index: "SearchIndex | None"):
+    global _search_index
+    _search_index = index
+
+
+def use_fingerprints(names: dict[str, str] | None):
+    # names maps static paths to their content-hashed names; pages and
+    # templates are rendered with the matching URLs.
+    global _asset_names, _asset_urls
+    _asset_names = names
+    _asset_urls = assets.asset_urls(names) if names is not None else None
+    helpers.use_asset_urls(_asset_urls)
+    templates.use_asset_urls(_asset_urls)
+
+
+def asset_renames(links: Iterable[tuple[str, str]]) -> dict[str, str]:
+    # The fingerprinted URLs a block's links were rendered with.
+    if not _asset_urls:
+        return {}
+    return {url: _asset_urls[url] for _, url in links if url in _asset_urls}
+
+
+def use_build_graph(graph: "BuildGraph | None"):
+    global _build_graph
+    _build_graph = graph
+
+
+def use_profiler(profiler: "Profiler"):
+    global _profiler
+    _profiler = profiler
+    profiler.instrument(helpers, "markdown_to_typed_blocks", "blocks")
+    profiler.instrument(helpers, "text_to_children", "inline", count_nodes=True)
+
+
+class BuildError(Exception):
+    def __init__(self, errors: list[tuple[str, str]]):
+        super().__init__(f"{len(errors)} page(s) failed to build")
+        self.errors = errors
+
+
+def markdown_to_html_node(
+    markdown: str, cache: "BlockCache | None" = None, toc: "TableOfContents | None" = None
+) -> ParentNode:
     children = []
-    blocks = helpers.markdown_to_blocks(markdown)
-    for block in blocks:
-        html_node = block_to_html_node(block)
-        children.append(html_node)
+    blocks = helpers.markdown_to_typed_blocks(markdown)
+    for block_type, block in blocks:
+        if cache is None or (toc is not None and block_type == "heading"):
+            children.append(block_to_html_node(block, block_type, toc))
+        else:
+            children.append(RawNode(cached_block_html(block, block_type, cache)))
 
     return ParentNode("div", children)
 
 
-def block_to_html_node(block):
-    block_type = helpers.block_to_block_type(block)
+def cached_block_html(block: str, block_type: str, cache: "BlockCache") -> str:
+    from blockcache import block_key
+
+    key = block_key(block)
+    entry = cache.get(key, lambda entry: entry[3] == asset_renames(entry[1]))
+    if entry is None:
+        links = []
+        text = []
+        previous = helpers.collect_links(links)
+        previous_text = helpers.collect_text(text)
+        try:
+            html = block_to_html_node(block, block_type).to_html()
+        finally:
+            helpers.collect_links(previous)
+            helpers.collect_text(previous_text)
+        cache.put(key, html, links, text, asset_renames(links))
+    else:
+        html, links, text, _ = entry
+    sink = helpers.current_link_sink()
+    if sink is not None:
+        sink.extend(links)
+    text_sink = helpers.current_text_sink()
+    if text_sink is not None:
+        text_sink.extend(text)
+    return html
+
+
+def block_to_html_node(block: str, block_type: str | None = None, toc: "TableOfContents | None" = None):
+    if block_type is None:
+        block_type = helpers.block_to_block_type(block)
     if block_type == "paragraph":
         return helpers.paragraph_to_html_node(block)
     if block_type == "heading":
-        return helpers.heading_to_html_node(block)
+        return helpers.heading_to_html_node(block, toc)
     if block_type == "code":
         return helpers.code_to_html_node(block)
     if block_type == "ordered_list":
@@ -33,37 +152,809 @@ def block_to_html_node(block):
     raise ValueError("invalid block type")
 
 
-def generate_page(from_path: str, template_path: str, dest_path: str):
-    print(f"Generating from {from_path} to {dest_path} using {template_path}")
-    with open(from_path, "r") as f:
-        markdown = f.read()
+def iter_blocks_html(
+    blocks: Iterable[tuple[str, str]], cache: "BlockCache | None" = None, toc: "TableOfContents | None" = None
+) -> Iterator[str]:
+    # Same output as markdown_to_html_node(...).to_html(), one block at a time.
+    # Heading ids depend on the headings before them, so headings skip the cache.
+    yield "<div>"
+    empty = True
+    for block_type, block in blocks:
+        empty = False
+        if cache is None or (toc is not None and block_type == "heading"):
+            yield from block_to_html_node(block, block_type, toc).iter_html()
+        else:
+            yield cached_block_html(block, block_type, cache)
+    if empty:
+        raise ValueError("invalid HTML: no children")
+    yield "</div>"
+
+
+def read_title_lines(lines: Iterator[str]) -> list[str]:
+    # Just enough of the document for extract_title: the "#" line and any
+    # blank lines up to the first text after it.
+    head = []
+    for line in lines:
+        if not head:
+            head.append(line)
+            if not line.startswith("#") or line[1:].strip():
+                break
+            continue
+        head.append(line)
+        if line.strip():
+            break
+    return head
+
+
+def toc_before_content(template: Template) -> bool:
+    names = [name for name, _ in template.slots]
+    return "TOC" in names and ("Content" not in names or names.index("TOC") < names.index("Content"))
+
+
+def write_streamed_page(stream: TextIO, lines: Iterable[str], template: Template, context: dict | None = None):
+    lines = iter(lines)
+    head = read_title_lines(lines)
+    title = helpers.extract_title("".join(head))
+    blocks = helpers.iter_typed_blocks(itertools.chain(head, lines))
+    from toc import TableOfContents
+
+    toc = TableOfContents()
+    content = iter_blocks_html(blocks, _block_cache, toc)
+    if toc_before_content(template):
+        # Every heading has to be seen before the TOC slot is written.
+        content = list(content)
+    context = {**(context or {}), "Title": escape_text(title), "Content": content, "TOC": toc}
+    template.write(stream, context)
+
+
+def write_rendered_page(stream: TextIO, markdown: str, template: Template, context: dict | None = None):
+    from toc import TableOfContents
 
     title = helpers.extract_title(markdown)
-    html_node = markdown_to_html_node(markdown)
+    toc = TableOfContents()
+    html_node = markdown_to_html_node(markdown, _block_cache, toc)
+    template.write(stream, {**(context or {}), "Title": escape_text(title), "Content": html_node, "TOC": toc})
+
 
-    with open(template_path, "r") as f:
-        template = f.read()
+def render_page(markdown: str, template: Template, context: dict | None = None) -> str:
+    buffer = io.StringIO()
+    write_rendered_page(buffer, markdown, template, context)
+    return buffer.getvalue()
+
+
+def render_source(template: Template, from_path: str, markdown: str) -> str:
+    return render_page(markdown, template, page_context(from_path))
+
+
+def render_page_source(dir_path: str, template_path: str, from_path: str, markdown: str) -> str:
+    template = load_template(page_template(from_path, dir_path, template_path))
+    return render_source(template, from_path, markdown)
+
+
+def page_context(from_path: str) -> dict:
+    modified = datetime.date.fromtimestamp(os.stat(from_path).st_mtime)
+    # Templates may put the path in an attribute, e.g. an "edit this page" link.
+    return {"Path": escape_attribute(from_path), "Date": modified.isoformat()}
+
+
+def write_page_profiled(from_path: str, template: Template, dest_path: str, profiler: "Profiler"):
+    from profiling import count_html_nodes
+    from toc import TableOfContents
+
+    with profiler.page(from_path) as page:
+        with page.stage("read"):
+            with open(from_path, "r") as f:
+                markdown = f.read()
+        with page.stage("extract_title"):
+            title = helpers.extract_title(markdown)
+
+        nested = ("blocks", "inline")
+        before = sum(page.stages[stage] for stage in nested)
+        with page.stage("build_tree"):
+            toc = TableOfContents()
+            html_node = markdown_to_html_node(markdown, _block_cache, toc)
+        page.stages["build_tree"] -= sum(page.stages[stage] for stage in nested) - before
+        page.html_nodes = count_html_nodes(html_node)
+
+        with page.stage("to_html"):
+            content = html_node.to_html()
+        with page.stage("render"):
+            context = {**page_context(from_path), "Title": escape_text(title), "Content": content, "TOC": toc}
+            html = template.render(context)
+        with page.stage("write"):
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            with atomic_write(dest_path) as f:
+                f.write(html)
+
+
+def write_page(from_path: str, template: Template, dest_path: str):
+    if _link_index is None and _build_graph is None and _search_index is None:
+        _write_page(from_path, template, dest_path)
+        return
+    # Links and text are collected from the inline tokens while the page renders.
+    links = []
+    text = [] if _search_index is not None else None
+    previous = helpers.collect_links(links)
+    previous_text = helpers.collect_text(text)
+    try:
+        _write_page(from_path, template, dest_path)
+    finally:
+        helpers.collect_links(previous)
+        helpers.collect_text(previous_text)
+    if _link_index is not None:
+        _link_index.set_page(_link_index.page_url(dest_path), links)
+    if _build_graph is not None:
+        _build_graph.record_page(from_path, template, dest_path, links)
+    if _search_index is not None:
+        from searchindex import term_positions
+
+        # Pages open with their "# " title, so it is the first text rendered.
+        _search_index.set_page(_search_index.page_url(dest_path), text[0] if text else "", term_positions(text))
+
+
+def forget_page(dest_path: str):
+    if _link_index is not None:
+        _link_index.remove_page(_link_index.page_url(dest_path))
+    if _search_index is not None:
+        _search_index.remove_page(_search_index.page_url(dest_path))
+    if _build_graph is not None:
+        _build_graph.remove(dest_path)
+
+
+def _write_page(from_path: str, template: Template, dest_path: str):
+    if _profiler is not None:
+        write_page_profiled(from_path, template, dest_path, _profiler)
+        return
 
     os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-    with open(dest_path, "w") as f:
-        f.write(template.replace("{{ Title }}", title).replace("{{ Content }}", html_node.to_html()))
+    with open(from_path, "r") as source, atomic_write(dest_path) as f:
+        write_streamed_page(f, source, template, page_context(from_path))
+
+
+def generate_page(from_path: str, template_path: str, dest_path: str):
+    print(f"Generating from {from_path} to {dest_path} using {template_path}")
+    write_page(from_path, load_template(template_path), dest_path)
+
+
+def dest_path_for(file: str, dir_path: str, dest_dir_path: str) -> str:
+    return file.replace(dir_path, dest_dir_path).replace(".md", ".html")
+
+
+def page_template(from_path: str, dir_path: str | None, template_path: str) -> str:
+    # The nearest template.html between the page and dir_path wins over the
+    # site-wide template.
+    if dir_path is None:
+        return template_path
+    directory = os.path.dirname(from_path)
+    while len(directory) >= len(dir_path):
+        candidate = os.path.join(directory, TEMPLATE_NAME)
+        if os.path.isfile(candidate):
+            return candidate
+        directory = os.path.dirname(directory)
+    return template_path
+
+
+def _init_worker(
+    cache_path: str | None,
+    profile: bool,
+    link_root: str | None,
+    graph_dirs: tuple | None,
+    asset_names: dict[str, str] | None,
+    search_root: str | None,
+):
+    if asset_names is not None:
+        use_fingerprints(asset_names)
+    if link_root is not None:
+        from linkindex import LinkIndex
+
+        use_link_index(LinkIndex(link_root))
+    if search_root is not None:
+        from searchindex import SearchIndex
+
+        use_search_index(SearchIndex(search_root))
+    if graph_dirs is not None:
+        from buildgraph import BuildGraph
+
+        use_build_graph(BuildGraph(None, *graph_dirs))
+    if helpers.current_interner() is not None:
+        helpers.current_interner().drain()
+    if profile:
+        if _profiler is None:
+            from profiling import Profiler
+
+            use_profiler(Profiler())
+        _profiler.drain()
+    if cache_path is not None:
+        if _block_cache is None:
+            from blockcache import BlockCache
+
+            use_block_cache(BlockCache.load(cache_path))
+        # A forked worker inherits the parent's counters; start from zero.
+        _block_cache.drain()
 
 
-def generate_pages_recursive(dir_path: str, template_path: str, dest_dir_path: str):
+def _generate_batch(batch: list[tuple[str, str, str]]) -> dict:
+    errors = []
+    for from_path, dest_path, template_path in batch:
+        print(f"Generating from {from_path} to {dest_path}")
+        try:
+            write_page(from_path, load_template(template_path), dest_path)
+        except Exception as e:
+            errors.append((from_path, f"{type(e).__name__}: {e}"))
+    interner = helpers.current_interner()
+    return {
+        "errors": errors,
+        "cache": _block_cache.drain() if _block_cache is not None else None,
+        "profiles": _profiler.drain() if _profiler is not None else None,
+        "links": _link_index.drain() if _link_index is not None else None,
+        "graph": _build_graph.drain() if _build_graph is not None else None,
+        "search": _search_index.drain() if _search_index is not None else None,
+        "interning": interner.drain() if interner is not None else None,
+    }
+
+
+def _worker_initargs() -> tuple:
+    # Spawned workers start from scratch, so they get the parent's settings.
+    cache_path = _block_cache.path if _block_cache is not None else None
+    link_root = _link_index.root if _link_index is not None else None
+    graph_dirs = (_build_graph.dest_dir, _build_graph.static_dir) if _build_graph is not None else None
+    search_root = _search_index.root if _search_index is not None else None
+    return (cache_path, _profiler is not None, link_root, graph_dirs, _asset_names, search_root)
+
+
+def generate_pages_parallel(
+    pages: list[tuple[str, str]],
+    template_path: str,
+    workers: int | None = None,
+    batch_size: int | None = None,
+    dir_path: str | None = None,
+):
+    if not pages:
+        return
+    workers = min(workers or os.cpu_count() or 1, len(pages))
+    if batch_size is None:
+        # A few batches per worker keeps the pool balanced when page sizes vary.
+        batch_size = max(1, len(pages) // (workers * 4))
+    pages = [(source, dest_path, page_template(source, dir_path, template_path)) for source, dest_path in pages]
+    batches = [pages[i : i + batch_size] for i in range(0, len(pages), batch_size)]
+
+    errors = []
+    from concurrent.futures import ProcessPoolExecutor
+
+    interner = helpers.current_interner()
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=_worker_initargs()) as executor:
+        for result in executor.map(_generate_batch, batches):
+            errors.extend(result["errors"])
+            if result["cache"] is not None:
+                _block_cache.merge(*result["cache"])
+            if result["profiles"] is not None:
+                _profiler.merge(result["profiles"])
+            if result["interning"] is not None and interner is not None:
+                interner.merge(*result["interning"])
+            if result["links"] is not None:
+                for page, links in result["links"].items():
+                    _link_index.set_page(page, links)
+            if result["graph"] is not None:
+                for output, inputs in result["graph"].items():
+                    _build_graph.set_inputs(output, inputs)
+            if result["search"] is not None:
+                _search_index.merge(result["search"])
+    if errors:
+        raise BuildError(errors)
+
+
+def build_pages(pages: list[tuple[str, str]], template_path: str, jobs: int = 1, dir_path: str | None = None):
+    if jobs == 1:
+        # Like the parallel build, one bad page does not stop the others.
+        errors = []
+        for from_path, dest_path in pages:
+            try:
+                generate_page(from_path, page_template(from_path, dir_path, template_path), dest_path)
+            except Exception as e:
+                errors.append((from_path, f"{type(e).__name__}: {e}"))
+        if errors:
+            raise BuildError(errors)
+    else:
+        generate_pages_parallel(pages, template_path, jobs or None, dir_path=dir_path)
+
+
+def find_pages(dir_path: str, dest_dir_path: str) -> list[tuple[str, str]]:
+    import glob
+
     files = glob.glob(os.path.join(dir_path, "**/*.md"), recursive=True)
-    for file in files:
-        dest_path = file.replace(dir_path, dest_dir_path).replace(".md", ".html")
-        generate_page(file, template_path, dest_path)
+    return [(file, dest_path_for(file, dir_path, dest_dir_path)) for file in files]
 
 
-def main():
+def generate_pages_recursive(
+    dir_path: str, template_path: str, dest_dir_path: str, jobs: int = 1, shard: tuple[int, int] | None = None
+) -> list[str]:
+    pages = find_pages(dir_path, dest_dir_path)
+    if shard is not None:
+        import sharding
+
+        pages = [page for page in pages if sharding.in_shard(page[0], dir_path, shard)]
+    build_pages(pages, template_path, jobs, dir_path)
+    return [dest_path for _, dest_path in pages]
+
+
+def generate_shard(
+    dir_path: str,
+    template_path: str,
+    static_path: str,
+    dest_dir_path: str,
+    shard: tuple[int, int],
+    jobs: int = 1,
+    link: bool = False,
+) -> set[str]:
+    import sharding
+
+    outputs = set()
+    for src, dest in assets.iter_static(static_path, dest_dir_path, _asset_names):
+        if sharding.in_shard(src, static_path, shard):
+            assets.sync_asset(src, dest, link)
+            outputs.add(dest)
+    outputs.update(generate_pages_recursive(dir_path, template_path, dest_dir_path, jobs, shard))
+    assets.prune(dest_dir_path, outputs | {os.path.join(dest_dir_path, sharding.SHARD_MANIFEST)})
+    # Written last: a shard without its manifest never finished.
+    sharding.write_manifest(dest_dir_path, shard, outputs)
+    return outputs
+
+
+def merge_shards(shard_dirs: list[str], dest_dir_path: str, link: bool = False) -> set[str]:
+    import sharding
+
+    files, errors = sharding.collect(shard_dirs)
+    if errors:
+        raise BuildError(errors)
+    outputs = set()
+    for name, directory in sorted(files.items()):
+        dest_path = os.path.join(dest_dir_path, *name.split("/"))
+        assets.sync_asset(os.path.join(directory, *name.split("/")), dest_path, link)
+        outputs.add(dest_path)
+    return outputs
+
+
+def generate_pages_async(
+    dir_path: str,
+    template_path: str,
+    dest_dir_path: str,
+    static_path: str | None = None,
+    jobs: int = 1,
+    max_in_flight: int = 32,
+) -> tuple[list[str], set[str]]:
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    from asyncbuild import AsyncBuilder
+
+    pages = find_pages(dir_path, dest_dir_path)
+    static_files = list(assets.iter_static(static_path, dest_dir_path, _asset_names)) if static_path else []
+
+    render = functools.partial(render_page_source, dir_path, template_path)
+    # One parsing thread keeps the block cache single-threaded; with --jobs
+    # parsing moves to worker processes instead.
+    if jobs == 1:
+        executor = ThreadPoolExecutor(1)
+    else:
+        executor = ProcessPoolExecutor(jobs or None, initializer=_init_worker, initargs=_worker_initargs())
+    with executor:
+        errors = AsyncBuilder(render, executor, max_in_flight).run(pages, static_files)
+    if errors:
+        raise BuildError(errors)
+    return [dest_path for _, dest_path in pages], {dest_path for _, dest_path in static_files}
+
+
+def _input_changed(manifest: "Manifest", path: str) -> bool:
     try:
-        shutil.rmtree("public")
+        return manifest.changed(path)
     except FileNotFoundError:
-        pass
-    shutil.copytree("static", "public")
+        return True
+
+
+def generate_pages_incremental(
+    dir_path: str,
+    template_path: str,
+    dest_dir_path: str,
+    manifest_path: str = MANIFEST_PATH,
+    jobs: int = 1,
+    static_outputs: set[str] | None = None,
+    static_path: str | None = None,
+) -> list[str]:
+    from buildgraph import BuildGraph
+    from manifest import Manifest
+
+    manifest = Manifest.load(manifest_path)
+    # The graph lives next to the manifest unless the caller (--watch) keeps
+    # one loaded across rebuilds.
+    owned = _build_graph is None
+    if owned:
+        graph_path = os.path.join(os.path.dirname(manifest_path), os.path.basename(GRAPH_PATH))
+        use_build_graph(BuildGraph.load(graph_path, dest_dir_path, static_path))
+    graph = _build_graph
+
+    try:
+        # Every recorded input is checked once; the graph maps the changed
+        # ones to exactly the outputs built from them.
+        changed = {path for path in list(graph.dependents) if _input_changed(manifest, path)}
+        dirty = graph.affected(changed)
+        # Outputs hold the URLs of the assets they link to, so an asset whose
+        # fingerprinted name changed, appeared or went away invalidates them.
+        manifest.asset_names = _asset_names or {}
+        if graph.static_dir is not None:
+            old, new = manifest.previous_asset_names, manifest.asset_names
+            renamed = [path for path in old.keys() | new.keys() if old.get(path) != new.get(path)]
+            dirty |= graph.affected(os.path.join(graph.static_dir, path) for path in renamed)
+
+        pages = []
+        for file, dest_path in find_pages(dir_path, dest_dir_path):
+            template = load_template(page_template(file, dir_path, template_path))
+            dependencies = [file, *template.dependencies]
+            recorded = graph.inputs.get(dest_path)
+            if (
+                dest_path in dirty
+                or recorded is None
+                or not set(dependencies).issubset(recorded)
+                or manifest.previous_outputs.get(file) != dest_path
+                or not os.path.exists(dest_path)
+                or (_search_index is not None and _search_index.page_url(dest_path) not in _search_index)
+            ):
+                pages.append((file, dest_path))
+                for path in dependencies:
+                    if path not in manifest.files:
+                        manifest.fingerprint(path)
+            manifest.outputs[file] = dest_path
+
+        if static_outputs is not None:
+            manifest.assets = static_outputs
+        else:
+            manifest.assets = manifest.previous_assets
+
+        for dest_path in manifest.stale_outputs():
+            print(f"Removing stale {dest_path}")
+            assets.remove_output(dest_path)
+            forget_page(dest_path)
+        for dest_path in manifest.stale_assets():
+            print(f"Removing stale {dest_path}")
+            assets.remove_output(dest_path)
+
+        try:
+            build_pages(pages, template_path, jobs, dir_path)
+        except BaseException as e:
+            # Forget failed pages so the next build retries them; an interrupted
+            # build may have stopped anywhere, so all of its pages are retried.
+            failed = {from_path for from_path, _ in e.errors} if isinstance(e, BuildError) else None
+            for from_path, dest_path in pages:
+                if failed is None or from_path in failed:
+                    manifest.files.pop(from_path, None)
+                    graph.remove(dest_path)
+            raise
+        finally:
+            # Static files referenced for the first time are only known now.
+            for path in graph.dependents:
+                if path not in manifest.files and os.path.exists(path):
+                    manifest.fingerprint(path)
+            manifest.save()
+            graph.save()
+    finally:
+        if owned:
+            use_build_graph(None)
+    return [from_path for from_path, _ in pages]
+
+
+def apply_changes(
+    changed: set[str],
+    removed: set[str],
+    dir_path: str,
+    static_path: str,
+    template_path: str,
+    dest_dir_path: str,
+):
+    rebuild = {}
+    if _build_graph is not None:
+        for dest_path in _build_graph.affected(changed | removed):
+            rebuild[dest_path] = _build_graph.source(dest_path)
+    elif template_path in changed:
+        generate_pages_recursive(dir_path, template_path, dest_dir_path)
+        changed = {path for path in changed if not path.endswith(".md")}
+
+    for path in sorted(changed | removed):
+        if path.startswith(static_path + os.sep):
+            dest_path = os.path.join(dest_dir_path, os.path.relpath(path, static_path))
+            if path in removed:
+                print(f"Removing {dest_path}")
+                assets.remove_output(dest_path)
+            else:
+                print(f"Copying {path} to {dest_path}")
+                assets.copy_asset(path, dest_path)
+        elif path.startswith(dir_path + os.sep) and path.endswith(".md"):
+            dest_path = dest_path_for(path, dir_path, dest_dir_path)
+            if path in removed:
+                print(f"Removing {dest_path}")
+                assets.remove_output(dest_path)
+                forget_page(dest_path)
+                rebuild.pop(dest_path, None)
+            else:
+                rebuild[dest_path] = path
+        elif path.startswith(dir_path + os.sep) and os.path.basename(path) == TEMPLATE_NAME:
+            # A directory template that appeared or went away moves every page
+            # below it to a different template.
+            directory = os.path.dirname(path) + os.sep
+            for from_path, dest_path in find_pages(dir_path, dest_dir_path):
+                if from_path.startswith(directory):
+                    rebuild[dest_path] = from_path
+
+    for dest_path, from_path in sorted(rebuild.items()):
+        if from_path not in removed and os.path.exists(from_path):
+            generate_page(from_path, page_template(from_path, dir_path, template_path), dest_path)
+
+
+def watch_site(port: int):
+    import watch
+    from buildgraph import BuildGraph
+
+    use_build_graph(BuildGraph.load(GRAPH_PATH, "public", "static"))
+    static_outputs = assets.sync_static("static", "public")
+    generate_pages_incremental(
+        "content", "template.html", "public", static_outputs=static_outputs, static_path="static"
+    )
+    save_search_index()
+
+    # Partials can live anywhere next to the templates that include them.
+    paths = ["content", "static", "template.html"]
+    watched = tuple(path + os.sep for path in paths)
+    paths += sorted(path for path in _build_graph.dependents if path not in paths and not path.startswith(watched))
+    notifier = watch.ReloadNotifier()
+    watch.serve("public", port, notifier)
+    print(f"Serving public/ at http://localhost:{port}, watching for changes")
+    for changed, removed in watch.poll(paths):
+        try:
+            apply_changes(changed, removed, "content", "static", "template.html", "public")
+        except Exception as e:
+            print(f"Rebuild failed: {type(e).__name__}: {e}", file=sys.stderr)
+            continue
+        save_search_index()
+        notifier.notify()
+
+
+def save_search_index():
+    # Builds that changed no page leave the index alone.
+    if _search_index is None or not _search_index.save():
+        return
+    size = sum(os.path.getsize(path) for path in _search_index.files())
+    print(f"Search index: {len(_search_index)} pages, {size / 1024:.1f} KiB")
+
+
+def prune_outputs(dest_dir_path: str, outputs: set[str], precompressed: bool = False):
+    if precompressed:
+        outputs = outputs | assets.compressed_siblings(outputs)
+    assets.prune(dest_dir_path, outputs)
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected I/N, got {value!r}")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {index} is not within 1..{count}")
+    return index, count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="keep public/ and rebuild only pages whose source or template changed",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes (0 uses every CPU core)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="serve public/ and rebuild changed pages and assets as they are edited",
+    )
+    parser.add_argument(
+        "--link-static",
+        action="store_true",
+        help="hard-link static files into public/ instead of copying them",
+    )
+    parser.add_argument(
+        "--block-cache",
+        action="store_true",
+        help=f"reuse rendered HTML for unchanged blocks across pages and builds ({BLOCK_CACHE_PATH}, one per shard)",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="REPORT",
+        help="time every build stage per page and write a .json or .csv report",
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="PATH",
+        help="dump cProfile stats for the build process (workers are not included)",
+    )
+    parser.add_argument(
+        "--check-links",
+        action="store_true",
+        help=f"keep a link index ({LINK_INDEX_PATH}) and report dead internal links (ignored by --async and shards)",
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="overlap reading sources, writing pages and copying assets with asyncio",
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=32,
+        help="pages and assets processed concurrently by --async (default: 32)",
+    )
+    parser.add_argument(
+        "--page",
+        metavar="SOURCE",
+        help="render a single content file into public/ and skip everything else",
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="I/N",
+        type=parse_shard,
+        help=f"build only shard I of N (1-based) into {SHARD_ROOT}/I-of-N for a later --merge",
+    )
+    parser.add_argument(
+        "--merge",
+        metavar="DIR",
+        nargs="+",
+        help="assemble public/ from finished shard directories, failing on any missing shard or collision",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="give static assets content-hashed names and rewrite the href/src URLs that point at them",
+    )
+    parser.add_argument(
+        "--precompress",
+        action="store_true",
+        help="write .gz (and .br when brotli is installed) next to every HTML, CSS and other text output",
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help=f"write a search index of every page's text to {SEARCH_INDEX_PATH} (ignored by --async and shards)",
+    )
+    parser.add_argument("--port", type=int, default=8888, help="port for --watch (default: 8888)")
+    args = parser.parse_args()
+
+    def cache_path(path: str) -> str:
+        import sharding
+
+        return sharding.cache_path(path, args.shard) if args.shard else path
+
+    if args.block_cache:
+        from blockcache import BlockCache
+
+        use_block_cache(BlockCache.load(cache_path(BLOCK_CACHE_PATH)))
+    if args.check_links and not (args.use_async or args.shard or args.merge):
+        # The async driver never feeds the index and shards only see part of
+        # the site. Full builds render every page, so only incremental ones
+        # reuse the index.
+        from linkindex import LinkIndex
+
+        if args.incremental or args.watch or args.page:
+            use_link_index(LinkIndex.load("public", LINK_INDEX_PATH))
+        else:
+            use_link_index(LinkIndex("public", LINK_INDEX_PATH))
+    if args.search and not (args.use_async or args.shard or args.merge):
+        # As with links, only a full build starts from an empty index.
+        from searchindex import SearchIndex
+
+        if args.incremental or args.watch or args.page:
+            use_search_index(SearchIndex.load("public", SEARCH_INDEX_PATH))
+        else:
+            use_search_index(SearchIndex("public", SEARCH_INDEX_PATH))
+    if args.profile:
+        from profiling import Profiler
+
+        use_profiler(Profiler())
+    if args.fingerprint and not args.watch:
+        from manifest import Manifest
+
+        hashes = Manifest.load(cache_path(ASSET_HASHES_PATH))
+        use_fingerprints(assets.fingerprint_static("static", hashes.fingerprint))
+        hashes.save()
+        if _link_index is not None:
+            _link_index.renamed = assets.asset_urls(_asset_names)
+    if args.cprofile:
+        import cProfile
+
+        cprofiler = cProfile.Profile()
+        cprofiler.enable()
+
+    try:
+        if args.page:
+            template_path = page_template(args.page, "content", "template.html")
+            generate_page(args.page, template_path, dest_path_for(args.page, "content", "public"))
+            save_search_index()
+            return
+
+        if args.watch:
+            try:
+                watch_site(args.port)
+            except KeyboardInterrupt:
+                pass
+            return
+
+        if args.shard:
+            import sharding
+
+            dest_dir_path = sharding.shard_dir(SHARD_ROOT, args.shard)
+            generate_shard(
+                "content", "template.html", "static", dest_dir_path, args.shard, args.jobs, args.link_static
+            )
+            return
+
+        if args.merge:
+            outputs = merge_shards(args.merge, "public", link=args.link_static)
+            prune_outputs("public", outputs, args.precompress)
+        elif args.use_async:
+            page_outputs, static_outputs = generate_pages_async(
+                "content", "template.html", "public", "static", args.jobs, args.max_in_flight
+            )
+            prune_outputs("public", static_outputs | set(page_outputs), args.precompress)
+        elif args.incremental:
+            static_outputs = assets.sync_static("static", "public", link=args.link_static, names=_asset_names)
+            generate_pages_incremental(
+                "content",
+                "template.html",
+                "public",
+                jobs=args.jobs,
+                static_outputs=static_outputs,
+                static_path="static",
+            )
+        else:
+            # A full build regenerates every page but only re-copies changed
+            # assets; anything else left in public/ is pruned.
+            static_outputs = assets.sync_static("static", "public", link=args.link_static, names=_asset_names)
+            page_outputs = generate_pages_recursive("content", "template.html", "public", jobs=args.jobs)
+            outputs = static_outputs | set(page_outputs)
+            if _search_index is not None:
+                outputs.update(_search_index.files())
+            prune_outputs("public", outputs, args.precompress)
 
-    generate_pages_recursive("content", "template.html", "public")
+        # Saved before precompressing, since the index is served with the site.
+        save_search_index()
+        if args.precompress:
+            written = assets.precompress("public")
+            print(f"Precompressed {len(written)} file(s)")
+    except BuildError as e:
+        for from_path, error in e.errors:
+            print(f"Failed to build {from_path}: {error}", file=sys.stderr)
+        sys.exit(f"Build failed: {e}")
+    finally:
+        if args.cprofile:
+            cprofiler.disable()
+            cprofiler.dump_stats(args.cprofile)
+        if _block_cache is not None:
+            _block_cache.save()
+            print(_block_cache.stats())
+        if _profiler is not None:
+            _profiler.write_report(args.profile)
+            print(_profiler.summary())
+            if helpers.current_interner() is not None:
+                print(helpers.current_interner().stats())
+        if _build_graph is not None:
+            _build_graph.save()
+        if _link_index is not None:
+            _link_index.save()
+            dead = _link_index.dead_links()
+            for page, target in dead:
+                print(f"Dead link on {page}: {target}", file=sys.stderr)
+            print(f"Link index: {len(_link_index.outbound)} pages, {len(dead)} dead link(s)")
 
 
 if __name__ == "__main__":
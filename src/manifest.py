@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+
+from atomicfile import atomic_write
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    def __init__(
+        self,
+        path: str,
+        files: dict | None = None,
+        outputs: dict | None = None,
+        assets: list | None = None,
+        asset_names: dict | None = None,
+    ):
+        self.path = path
+        self.previous: dict[str, dict] = files or {}
+        self.files: dict[str, dict] = {}
+        self.previous_outputs: dict[str, str] = outputs or {}
+        self.outputs: dict[str, str] = {}
+        self.previous_assets: set[str] = set(assets or ())
+        self.assets: set[str] = set()
+        # The fingerprinted asset names the outputs link to.
+        self.previous_asset_names: dict[str, str] = asset_names or {}
+        self.asset_names: dict[str, str] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "Manifest":
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return cls(path)
+        return cls(path, data.get("files"), data.get("outputs"), data.get("assets"), data.get("asset_names"))
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with atomic_write(self.path) as f:
+            data = {
+                "files": self.files,
+                "outputs": self.outputs,
+                "assets": sorted(self.assets),
+                "asset_names": self.asset_names,
+            }
+            json.dump(data, f, indent=1, sort_keys=True)
+
+    def fingerprint(self, path: str) -> str:
+        # Unchanged size and mtime means unchanged content, so a no-op build
+        # never has to read the sources.
+        st = os.stat(path)
+        old = self.previous.get(path)
+        if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+            digest = old["hash"]
+        else:
+            digest = file_hash(path)
+        self.files[path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": digest}
+        return digest
+
+    def changed(self, path: str) -> bool:
+        digest = self.fingerprint(path)
+        old = self.previous.get(path)
+        return old is None or old["hash"] != digest
+
+    def stale_outputs(self) -> list[str]:
+        current = set(self.outputs.values())
+        return [
+            dest
+            for source, dest in self.previous_outputs.items()
+            if source not in self.outputs and dest not in current
+        ]
+
+    def stale_assets(self) -> list[str]:
+        current = set(self.outputs.values())
+        return sorted(self.previous_assets - self.assets - current)
@@ -0,0 +1,140 @@
+import functools
+import json
+import time
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Iterator
+
+from htmlnode import HTMLNode
+
+STAGES = [
+    "read",
+    "extract_title",
+    "blocks",
+    "inline",
+    "build_tree",
+    "to_html",
+    "render",
+    "write",
+]
+
+
+def count_html_nodes(node: HTMLNode) -> int:
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if node.children:
+            stack.extend(node.children)
+    return count
+
+
+class PageProfile:
+    def __init__(self, path: str):
+        self.path = path
+        self.stages = dict.fromkeys(STAGES, 0.0)
+        self.text_nodes = 0
+        self.html_nodes = 0
+
+    @property
+    def total(self) -> float:
+        return sum(self.stages.values())
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] += time.perf_counter() - start
+
+    def to_dict(self) -> dict:
+        return {
+            "path": self.path,
+            "total": self.total,
+            **self.stages,
+            "text_nodes": self.text_nodes,
+            "html_nodes": self.html_nodes,
+        }
+
+
+class Profiler:
+    def __init__(self):
+        self.pages: list[PageProfile] = []
+        self.current: PageProfile | None = None
+
+    @contextmanager
+    def page(self, path: str) -> Iterator[PageProfile]:
+        self.current = PageProfile(path)
+        try:
+            yield self.current
+        finally:
+            self.pages.append(self.current)
+            self.current = None
+
+    def instrument(self, module: ModuleType, name: str, stage: str, count_nodes: bool = False):
+        func = getattr(module, name)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            page = self.current
+            if page is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            page.stages[stage] += time.perf_counter() - start
+            if count_nodes:
+                page.text_nodes += len(result)
+            return result
+
+        setattr(module, name, wrapper)
+
+    def drain(self) -> list[dict]:
+        pages = [page.to_dict() for page in self.pages]
+        self.pages = []
+        return pages
+
+    def merge(self, pages: list[dict]):
+        for data in pages:
+            page = PageProfile(data["path"])
+            page.stages = {stage: data[stage] for stage in STAGES}
+            page.text_nodes = data["text_nodes"]
+            page.html_nodes = data["html_nodes"]
+            self.pages.append(page)
+
+    def slowest(self, top: int) -> list[PageProfile]:
+        return sorted(self.pages, key=lambda page: page.total, reverse=True)[:top]
+
+    def totals(self) -> dict[str, float]:
+        return {stage: sum(page.stages[stage] for page in self.pages) for stage in STAGES}
+
+    def write_report(self, path: str, top: int = 20):
+        if path.endswith(".csv"):
+            import csv
+
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, ["path", "total", *STAGES, "text_nodes", "html_nodes"])
+                writer.writeheader()
+                for page in self.slowest(len(self.pages)):
+                    writer.writerow(page.to_dict())
+            return
+        report = {
+            "pages": len(self.pages),
+            "totals": self.totals(),
+            "slowest": [page.to_dict() for page in self.slowest(top)],
+            "all": [page.to_dict() for page in self.pages],
+        }
+        with open(path, "w") as f:
+            json.dump(report, f, indent=1)
+
+    def summary(self, top: int = 10) -> str:
+        lines = [f"Profiled {len(self.pages)} page(s)"]
+        totals = self.totals()
+        overall = sum(totals.values()) or 1
+        for stage, seconds in totals.items():
+            lines.append(f"  {stage:<20}{seconds * 1000:>10.1f} ms {seconds / overall:>6.1%}")
+        lines.append("Slowest pages:")
+        for page in self.slowest(top):
+            lines.append(f"  {page.total * 1000:>10.1f} ms  {page.html_nodes:>7} nodes  {page.path}")
+        return "\n".join(lines)
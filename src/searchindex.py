@@ -0,0 +1,222 @@
+import contextlib
+import itertools
+import json
+import operator
+import os
+import re
+import zlib
+from array import array
+from collections import defaultdict
+from typing import Iterable
+
+from atomicfile import atomic_write
+from linkindex import normalize_url
+
+INDEX_VERSION = 2
+# Pages are spread over this many files by URL, so an update rewrites only the
+# segments holding the pages it touched.
+SEGMENTS = 32
+_TOKEN_PATTERN = re.compile(r"\w+")
+# ASCII text splits the same as \w+ by blanking everything else, and
+# translate + split is several times faster than the regex.
+_SEPARATORS = str.maketrans({i: " " for i in range(128) if not (chr(i).isalnum() or chr(i) == "_")})
+
+
+def tokenize(text: str) -> list[str]:
+    text = text.lower()
+    if text.isascii():
+        return text.translate(_SEPARATORS).split()
+    return _TOKEN_PATTERN.findall(text)
+
+
+def term_positions(texts: Iterable[str]) -> dict[str, list[int]]:
+    terms = defaultdict(list)
+    for position, token in enumerate(tokenize(" ".join(texts))):
+        terms[token].append(position)
+    return dict(terms)
+
+
+def segment_of(page: str) -> int:
+    return zlib.crc32(page.encode()) % SEGMENTS
+
+
+class SearchIndex:
+    def __init__(self, root: str, path: str | None = None):
+        self.root = root
+        self.path = path
+        # page url -> (title, term -> positions) for the segments read so far.
+        # The inverted form is only built when saving, so replacing a page
+        # touches nothing else; positions are arrays so the garbage collector
+        # never has to scan them.
+        self.pages: dict[str, tuple[str, dict[str, array]]] = {}
+        # The urls in every segment, read or not. A new index has nothing to
+        # read and writes every segment, so a full build leaves no stale pages.
+        self.urls: list[set[str]] = [set() for _ in range(SEGMENTS)]
+        self.loaded = set(range(SEGMENTS))
+        self.dirty = set(range(SEGMENTS))
+
+    @classmethod
+    def load(cls, root: str, path: str) -> "SearchIndex":
+        # Only the page list is read up front; a segment is decoded when one
+        # of its pages changes or the whole index is searched.
+        index = cls(root, path)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return index
+        if data.get("version") != INDEX_VERSION or len(data["segments"]) != SEGMENTS:
+            return index
+        index.urls = [set(urls) for urls in data["segments"]]
+        index.loaded = set()
+        index.dirty = set()
+        return index
+
+    def __contains__(self, page: str) -> bool:
+        return page in self.urls[segment_of(page)]
+
+    def __len__(self) -> int:
+        return sum(map(len, self.urls))
+
+    def segment_path(self, segment: int) -> str:
+        stem, ext = os.path.splitext(self.path)
+        return f"{stem}.{segment}{ext}"
+
+    def files(self) -> list[str]:
+        return [self.path, *(self.segment_path(i) for i, urls in enumerate(self.urls) if urls)]
+
+    def load_segment(self, segment: int):
+        if segment in self.loaded:
+            return
+        self.loaded.add(segment)
+        try:
+            with open(self.segment_path(segment), "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+        if data.get("version") != INDEX_VERSION:
+            # Any pages listed here are gone; forgetting them lets an
+            # incremental build index them again.
+            if self.urls[segment]:
+                self.urls[segment] = set()
+                self.dirty.add(segment)
+            return
+        pages = [(url, title, {}) for url, title in data["pages"]]
+        for term, postings in data["terms"].items():
+            for page_id, positions in decode_postings(postings):
+                pages[page_id][2][term] = positions
+        for url, title, terms in pages:
+            self.pages[url] = (title, terms)
+
+    def load_all(self):
+        for segment in range(SEGMENTS):
+            self.load_segment(segment)
+
+    def save(self) -> bool:
+        # Only segments whose pages changed are written; returns whether
+        # anything was.
+        if self.path is None or not self.dirty:
+            return False
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        for segment in sorted(self.dirty):
+            path = self.segment_path(segment)
+            if not self.urls[segment]:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+                continue
+            # One dumps call is several times faster than json.dump's chunked writes.
+            data = json.dumps(self.encode(segment), separators=(",", ":"))
+            with atomic_write(path) as f:
+                f.write(data)
+        # The page list goes last, so it never names a segment not yet written.
+        data = {"version": INDEX_VERSION, "segments": [sorted(urls) for urls in self.urls]}
+        with atomic_write(self.path) as f:
+            f.write(json.dumps(data, separators=(",", ":")))
+        self.dirty = set()
+        return True
+
+    def encode(self, segment: int) -> dict:
+        # Page ids follow URL order, so an unchanged segment encodes identically.
+        urls = sorted(self.urls[segment])
+        postings: dict[str, list[tuple[int, array]]] = defaultdict(list)
+        for page_id, url in enumerate(urls):
+            for term, positions in self.pages[url][1].items():
+                postings[term].append((page_id, positions))
+        return {
+            "version": INDEX_VERSION,
+            "pages": [[url, self.pages[url][0]] for url in urls],
+            "terms": {term: encode_postings(postings[term]) for term in sorted(postings)},
+        }
+
+    def drain(self) -> dict[str, tuple[str, dict[str, array]]]:
+        pages = self.pages
+        self.pages = {}
+        self.urls = [set() for _ in range(SEGMENTS)]
+        return pages
+
+    def merge(self, pages: dict[str, tuple[str, dict[str, array]]]):
+        for page, entry in pages.items():
+            self._put(page, entry)
+
+    def page_url(self, dest_path: str) -> str:
+        return normalize_url("/" + os.path.relpath(dest_path, self.root).replace(os.sep, "/"))
+
+    def set_page(self, page: str, title: str, terms: dict[str, list[int]]):
+        self._put(page, (title, {term: array("I", positions) for term, positions in terms.items()}))
+
+    def _put(self, page: str, entry: tuple[str, dict[str, array]]):
+        segment = segment_of(page)
+        self.load_segment(segment)
+        self.pages[page] = entry
+        self.urls[segment].add(page)
+        self.dirty.add(segment)
+
+    def positions(self, page: str, term: str) -> list[int]:
+        self.load_segment(segment_of(page))
+        return list(self.pages[page][1].get(term, ()))
+
+    def remove_page(self, page: str):
+        segment = segment_of(page)
+        if page not in self.urls[segment]:
+            return
+        self.load_segment(segment)
+        self.pages.pop(page, None)
+        self.urls[segment].discard(page)
+        self.dirty.add(segment)
+
+    def search(self, query: str) -> list[str]:
+        # Pages containing every term of the query, most matches first.
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        self.load_all()
+        scores = {}
+        for page, (_, terms) in self.pages.items():
+            if all(token in terms for token in tokens):
+                scores[page] = sum(len(terms[token]) for token in tokens)
+        return sorted(scores, key=lambda page: (-scores[page], page))
+
+
+def encode_postings(postings: list[tuple[int, array]]) -> list[int]:
+    # Flattened as [page id gap, count, position gaps...] per page; gaps keep
+    # the numbers, and so the JSON, short.
+    encoded = []
+    previous_page = 0
+    for page_id, positions in postings:
+        encoded += (page_id - previous_page, len(positions), positions[0])
+        encoded += map(operator.sub, itertools.islice(positions, 1, None), positions)
+        previous_page = page_id
+    return encoded
+
+
+def decode_postings(encoded: list[int]) -> list[tuple[int, array]]:
+    postings = []
+    page_id = 0
+    i = 0
+    while i < len(encoded):
+        page_id += encoded[i]
+        count = encoded[i + 1]
+        i += 2
+        postings.append((page_id, array("I", itertools.accumulate(encoded[i : i + count]))))
+        i += count
+    return postings
@@ -0,0 +1,224 @@
+import argparse
+import email.utils
+import http.server
+import mimetypes
+import os
+import posixpath
+import threading
+from collections import OrderedDict
+from urllib.parse import unquote, urlsplit
+
+# Larger files skip the cache and go straight from the page cache to the
+# socket with sendfile.
+SENDFILE_THRESHOLD = 256 * 1024
+# Preferred first; each is served only when a fresh sibling exists.
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+class FileCache:
+    def __init__(self, max_size: int = 64 * 1024 * 1024):
+        self.max_size = max_size
+        self.size = 0
+        # path -> ((mtime_ns, size), body); a stat that no longer matches is a miss.
+        self.entries: OrderedDict[str, tuple[tuple[int, int], bytes]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, path: str, st: os.stat_result) -> bytes:
+        key = (st.st_mtime_ns, st.st_size)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry[0] == key:
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            body = f.read()
+        self.store(path, (st.st_mtime_ns, st.st_size), body)
+        return body
+
+    def store(self, path: str, key: tuple[int, int], body: bytes):
+        with self.lock:
+            old = self.entries.pop(path, None)
+            if old is not None:
+                self.size -= len(old[1])
+            self.entries[path] = (key, body)
+            self.size += len(body)
+            while self.size > self.max_size and self.entries:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted[1])
+
+    def stats(self) -> str:
+        lookups = self.hits + self.misses
+        ratio = self.hits / lookups if lookups else 0
+        return f"File cache: {self.hits} hits, {self.misses} misses ({ratio:.0%} hit rate), {len(self.entries)} entries"
+
+
+def accepted_encodings(header: str) -> set[str]:
+    accepted = set()
+    for token in header.split(","):
+        name, _, params = token.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip() and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def etag(st: os.stat_result, encoding: str | None = None) -> str:
+    tag = f"{st.st_mtime_ns:x}-{st.st_size:x}"
+    return f'"{tag}-{encoding}"' if encoding else f'"{tag}"'
+
+
+def etag_matches(header: str, tag: str) -> bool:
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == tag:
+            return True
+    return False
+
+
+class PreviewRequestHandler(http.server.BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections open between requests; idle ones are
+    # closed after the timeout so they don't pin a thread. Headers and body
+    # go out in separate writes, which Nagle would hold back on a kept-alive
+    # connection until the client's delayed ACK.
+    protocol_version = "HTTP/1.1"
+    timeout = 15
+    disable_nagle_algorithm = True
+    directory: str
+    cache: FileCache
+
+    def do_GET(self):
+        self.send_file(send_body=True)
+
+    def do_HEAD(self):
+        self.send_file(send_body=False)
+
+    def resolve(self) -> str | None:
+        url_path = urlsplit(self.path).path
+        parts = [part for part in posixpath.normpath(unquote(url_path)).split("/") if part not in ("", ".", "..")]
+        path = os.path.join(self.directory, *parts)
+        if os.path.isdir(path):
+            if not url_path.endswith("/"):
+                self.send_response(301)
+                self.send_header("Location", url_path + "/")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return None
+            path = os.path.join(path, "index.html")
+        return path
+
+    def negotiate(self, path: str, st: os.stat_result) -> tuple[str, os.stat_result, str | None]:
+        accepted = accepted_encodings(self.headers.get("Accept-Encoding", ""))
+        for encoding, suffix in ENCODINGS:
+            if encoding not in accepted:
+                continue
+            try:
+                encoded = os.stat(path + suffix)
+            except OSError:
+                continue
+            # --precompress stamps siblings with the source's mtime.
+            if encoded.st_mtime_ns == st.st_mtime_ns:
+                return path + suffix, encoded, encoding
+        return path, st, None
+
+    def send_file(self, send_body: bool):
+        path = self.resolve()
+        if path is None:
+            return
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.send_error(404)
+            return
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+
+        file, file_st, encoding = self.negotiate(path, st)
+        tag = etag(file_st, encoding)
+        if etag_matches(self.headers.get("If-None-Match", ""), tag):
+            self.send_response(304)
+            self.send_header("ETag", tag)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return
+
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if content_type.startswith("text/"):
+            content_type += "; charset=utf-8"
+        body = None
+        if send_body and file_st.st_size <= SENDFILE_THRESHOLD:
+            try:
+                body = self.cache.get(file, file_st)
+            except OSError:
+                self.send_error(404)
+                return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body) if body is not None else file_st.st_size))
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("ETag", tag)
+        self.send_header("Last-Modified", email.utils.formatdate(file_st.st_mtime, usegmt=True))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if not send_body:
+            return
+        try:
+            if body is not None:
+                self.wfile.write(body)
+                return
+            with open(file, "rb") as f:
+                self.connection.sendfile(f, 0, file_st.st_size)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+
+class PreviewServer(http.server.ThreadingHTTPServer):
+    # Load tests open many connections at once; the default backlog of 5 drops them.
+    request_queue_size = 128
+
+
+def make_server(directory: str, port: int, cache: FileCache | None = None, quiet: bool = False) -> PreviewServer:
+    class Handler(PreviewRequestHandler):
+        def log_message(self, format, *args):
+            if not quiet:
+                super().log_message(format, *args)
+
+    Handler.directory = os.path.abspath(directory)
+    Handler.cache = cache if cache is not None else FileCache()
+    return PreviewServer(("", port), Handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a built site with keep-alive, caching and precompressed files")
+    parser.add_argument("directory", nargs="?", default="public", help="directory to serve (default: public)")
+    parser.add_argument("--port", type=int, default=8888, help="port to listen on (default: 8888)")
+    parser.add_argument("--quiet", action="store_true", help="don't log every request")
+    args = parser.parse_args()
+
+    server = make_server(args.directory, args.port, quiet=args.quiet)
+    print(f"Serving {args.directory}/ at http://localhost:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(server.RequestHandlerClass.cache.stats())
+
+
+if __name__ == "__main__":
+    main()
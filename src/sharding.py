@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+
+from atomicfile import atomic_write
+
+SHARD_MANIFEST = ".shard.json"
+
+
+def shard_index(path: str, count: int) -> int:
+    # Keyed on the path relative to its root with "/" separators, so every
+    # machine agrees no matter where the checkout lives.
+    digest = hashlib.blake2b(path.replace(os.sep, "/").encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count + 1
+
+
+def in_shard(path: str, root: str, shard: tuple[int, int]) -> bool:
+    index, count = shard
+    return shard_index(os.path.relpath(path, root), count) == index
+
+
+def shard_dir(base: str, shard: tuple[int, int]) -> str:
+    index, count = shard
+    return os.path.join(base, f"{index}-of-{count}")
+
+
+def cache_path(path: str, shard: tuple[int, int]) -> str:
+    # Shards build concurrently, so each keeps its own copy of a cache file.
+    index, count = shard
+    root, ext = os.path.splitext(path)
+    return f"{root}.{index}-of-{count}{ext}"
+
+
+def write_manifest(dest_dir: str, shard: tuple[int, int], outputs: set[str]):
+    index, count = shard
+    files = sorted(os.path.relpath(path, dest_dir).replace(os.sep, "/") for path in outputs)
+    # A shard that got no files has nothing else creating its directory.
+    os.makedirs(dest_dir, exist_ok=True)
+    with atomic_write(os.path.join(dest_dir, SHARD_MANIFEST)) as f:
+        json.dump({"shard": index, "count": count, "files": files}, f, indent=1)
+
+
+def read_manifest(dest_dir: str) -> dict:
+    with open(os.path.join(dest_dir, SHARD_MANIFEST), "r") as f:
+        return json.load(f)
+
+
+def collect(shard_dirs: list[str]) -> tuple[dict[str, str], list[tuple[str, str]]]:
+    # Maps each relative output path to the shard directory that holds it;
+    # anything that would make the merged site ambiguous or incomplete is
+    # reported instead.
+    files: dict[str, str] = {}
+    errors = []
+    indices: dict[int, str] = {}
+    counts = set()
+    for directory in shard_dirs:
+        try:
+            manifest = read_manifest(directory)
+        except (FileNotFoundError, json.JSONDecodeError):
+            errors.append((directory, "no shard manifest; the shard build did not finish"))
+            continue
+        counts.add(manifest["count"])
+        if manifest["shard"] in indices:
+            errors.append((directory, f"shard {manifest['shard']} also in {indices[manifest['shard']]}"))
+        indices[manifest["shard"]] = directory
+        for name in manifest["files"]:
+            if name in files:
+                errors.append((name, f"written by both {files[name]} and {directory}"))
+                continue
+            if not os.path.isfile(os.path.join(directory, *name.split("/"))):
+                errors.append((name, f"listed but missing in {directory}"))
+                continue
+            files[name] = directory
+
+    if len(counts) > 1:
+        errors.append((", ".join(shard_dirs), f"shards come from different splits: {sorted(counts)}"))
+    elif counts:
+        count = counts.pop()
+        for index in range(1, count + 1):
+            if index not in indices:
+                errors.append((f"{index}/{count}", "shard missing"))
+    return files, errors
@@ -0,0 +1,103 @@
+import io
+import os
+import re
+from typing import Iterable, TextIO
+
+from htmlnode import HTMLNode
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+INCLUDE_PATTERN = re.compile(r"\{\{>\s*([^\s}]+)\s*\}\}")
+URL_ATTRIBUTE_PATTERN = re.compile(r"""(\b(?:href|src)=)(["'])(.*?)\2""")
+
+
+class Template:
+    __slots__ = ("literals", "slots", "dependencies", "links")
+
+    def __init__(self, source: str, dependencies: Iterable[str] = (), urls: dict[str, str] | None = None):
+        # Files the source was read from: the template and every partial it includes.
+        self.dependencies: list[str] = list(dependencies)
+        # href/src values as written, before any asset URL rewriting.
+        self.links: list[str] = [match.group(3) for match in URL_ATTRIBUTE_PATTERN.finditer(source)]
+        if urls:
+
+            def rewrite(match: re.Match) -> str:
+                attribute, quote, url = match.groups()
+                return f"{attribute}{quote}{urls.get(url, url)}{quote}"
+
+            source = URL_ATTRIBUTE_PATTERN.sub(rewrite, source)
+        # literals[i] is written before slots[i]; the last literal closes the page.
+        self.literals: list[str] = []
+        self.slots: list[tuple[str, str]] = []
+        pos = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            self.literals.append(source[pos : match.start()])
+            self.slots.append((match.group(1), match.group()))
+            pos = match.end()
+        self.literals.append(source[pos:])
+
+    @property
+    def names(self) -> set[str]:
+        return {name for name, _ in self.slots}
+
+    def write(self, stream: TextIO, context: dict):
+        write = stream.write
+        for literal, (name, placeholder) in zip(self.literals, self.slots):
+            write(literal)
+            value = context.get(name)
+            if value is None:
+                write(placeholder)
+            elif isinstance(value, str):
+                write(value)
+            elif isinstance(value, HTMLNode):
+                value.write_html(stream)
+            else:
+                # Any other iterable of chunks, e.g. a streamed page body.
+                for chunk in value:
+                    write(chunk)
+        write(self.literals[-1])
+
+    def render(self, context: dict) -> str:
+        buffer = io.StringIO()
+        self.write(buffer, context)
+        return buffer.getvalue()
+
+
+def read_template(path: str, mtimes: dict[str, int], including: tuple[str, ...] = ()) -> str:
+    # Partials are spliced in before parsing, so they may contain slots and
+    # further includes. Include paths are relative to the including file.
+    if path in including:
+        raise ValueError(f"template include cycle: {' -> '.join(including + (path,))}")
+    mtimes[path] = os.stat(path).st_mtime_ns
+    with open(path, "r") as f:
+        source = f.read()
+    directory = os.path.dirname(path)
+    return INCLUDE_PATTERN.sub(
+        lambda match: read_template(os.path.join(directory, match.group(1)), mtimes, including + (path,)), source
+    )
+
+
+def _unchanged(mtimes: dict[str, int]) -> bool:
+    try:
+        return all(os.stat(path).st_mtime_ns == mtime for path, mtime in mtimes.items())
+    except FileNotFoundError:
+        return False
+
+
+_cache: dict[str, tuple[dict[str, int], Template]] = {}
+_asset_urls: dict[str, str] | None = None
+
+
+def use_asset_urls(urls: dict[str, str] | None):
+    global _asset_urls
+    _asset_urls = urls
+    _cache.clear()
+
+
+def load_template(path: str) -> Template:
+    cached = _cache.get(path)
+    if cached is not None and _unchanged(cached[0]):
+        return cached[1]
+    mtimes = {}
+    template = Template(read_template(path, mtimes), mtimes, _asset_urls)
+    _cache[path] = (mtimes, template)
+    return template
@@ -0,0 +1,112 @@
+import contextlib
+import gzip
+import io
+import os
+import unittest
+
+import assets
+from fixtures import TempDirTestCase
+
+
+class TestAssets(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.css = os.path.join(self.static, "index.css")
+        self.image = os.path.join(self.static, "images", "logo.png")
+        self.write(self.css, "body {}")
+        self.write(self.image, "png")
+
+    def sync(self, link=False):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            outputs = assets.sync_static(self.static, self.public, link)
+        return outputs, stdout.getvalue().count("Copying")
+
+    def test_sync_copies_only_changed(self):
+        outputs, copied = self.sync()
+        self.assertEqual(copied, 2)
+        self.assertEqual(
+            outputs, {os.path.join(self.public, "index.css"), os.path.join(self.public, "images", "logo.png")}
+        )
+        self.assertEqual(self.sync()[1], 0)
+
+        self.write(self.css, "body { color: red; }")
+        self.assertEqual(self.sync()[1], 1)
+        with open(os.path.join(self.public, "index.css")) as f:
+            self.assertEqual(f.read(), "body { color: red; }")
+
+    def test_sync_link(self):
+        self.sync(link=True)
+        dest = os.path.join(self.public, "index.css")
+        self.assertTrue(os.path.samefile(self.css, dest))
+
+        # Replacing a hard-linked output must not write through to static/.
+        os.remove(self.css)
+        self.write(self.css, "p {}")
+        self.sync()
+        self.assertFalse(os.path.samefile(self.css, dest))
+        with open(self.css) as f:
+            self.assertEqual(f.read(), "p {}")
+
+    def test_prune_keeps_outputs(self):
+        outputs, _ = self.sync()
+        page = os.path.join(self.public, "index.html")
+        stale = os.path.join(self.public, "old", "index.html")
+        self.write(page, "<html></html>")
+        self.write(stale, "<html></html>")
+        with contextlib.redirect_stdout(io.StringIO()):
+            removed = assets.prune(self.public, outputs | {page})
+        self.assertEqual(removed, [stale])
+        self.assertTrue(os.path.exists(page))
+        self.assertFalse(os.path.exists(os.path.dirname(stale)))
+
+    def test_fingerprint_static(self):
+        self.write(os.path.join(self.static, "robots.txt"), "")
+        names = assets.fingerprint_static(self.static, lambda path: "0123456789abcdef")
+        self.assertEqual(
+            names,
+            {
+                "index.css": "index.0123456789ab.css",
+                os.path.join("images", "logo.png"): os.path.join("images", "logo.0123456789ab.png"),
+            },
+        )
+        self.assertEqual(
+            assets.asset_urls(names),
+            {"/index.css": "/index.0123456789ab.css", "/images/logo.png": "/images/logo.0123456789ab.png"},
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            outputs = assets.sync_static(self.static, self.public, names=names)
+        self.assertIn(os.path.join(self.public, "index.0123456789ab.css"), outputs)
+        self.assertIn(os.path.join(self.public, "robots.txt"), outputs)
+
+    def test_precompress_skips_unchanged(self):
+        page = os.path.join(self.public, "index.html")
+        self.write(page, "<p>hello</p>" * 100)
+        self.write(os.path.join(self.public, "logo.png"), "png")
+        self.assertEqual(assets.precompress(self.public), [page + ".gz"])
+        with open(page + ".gz", "rb") as f:
+            self.assertEqual(gzip.decompress(f.read()), b"<p>hello</p>" * 100)
+        self.assertEqual(assets.precompress(self.public), [])
+
+        self.write(page, "<p>changed</p>")
+        os.utime(page, ns=(0, os.stat(page).st_mtime_ns + 1))
+        self.assertEqual(assets.precompress(self.public), [page + ".gz"])
+
+    def test_precompress_removes_orphans(self):
+        page = os.path.join(self.public, "old.html")
+        self.write(page, "<p>old</p>")
+        assets.precompress(self.public)
+        os.remove(page)
+        assets.precompress(self.public)
+        self.assertFalse(os.path.exists(page + ".gz"))
+
+        self.write(page, "<p>old</p>")
+        assets.precompress(self.public)
+        assets.remove_output(page)
+        self.assertFalse(os.path.exists(page + ".gz"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import contextlib
+import filecmp
+import io
+import os
+import shutil
+import subprocess
+import sys
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import main
+from asyncbuild import AsyncBuilder
+from fixtures import TempDirTestCase
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestAsyncBuild(TempDirTestCase):
+    def test_builder_collects_errors(self):
+        good = os.path.join(self.tmp.name, "good.md")
+        self.write(good, "hello")
+        missing = os.path.join(self.tmp.name, "missing.md")
+        pages = [
+            (good, os.path.join(self.tmp.name, "out", "good.html")),
+            (missing, os.path.join(self.tmp.name, "out", "missing.html")),
+        ]
+        with ThreadPoolExecutor(1) as executor, contextlib.redirect_stdout(io.StringIO()):
+            errors = AsyncBuilder(lambda path, markdown: markdown.upper(), executor, 2).run(pages)
+        self.assertEqual([path for path, _ in errors], [missing])
+        with open(os.path.join(self.tmp.name, "out", "good.html")) as f:
+            self.assertEqual(f.read(), "HELLO")
+
+    def test_async_build_matches_serial(self):
+        content = os.path.join(ROOT, "content")
+        template = os.path.join(ROOT, "template.html")
+        serial = os.path.join(self.tmp.name, "serial")
+        concurrent = os.path.join(self.tmp.name, "async")
+        with contextlib.redirect_stdout(io.StringIO()):
+            pages = main.generate_pages_recursive(content, template, serial)
+            outputs, static_outputs = main.generate_pages_async(
+                content, template, concurrent, os.path.join(ROOT, "static"), max_in_flight=2
+            )
+        self.assertEqual(len(outputs), len(pages))
+        self.assertIn(os.path.join(concurrent, "index.css"), static_outputs)
+        self.assertTrue(os.path.exists(os.path.join(concurrent, "images", "rivendell.png")))
+        for path in ["index.html", os.path.join("majesty", "index.html")]:
+            self.assertTrue(filecmp.cmp(os.path.join(serial, path), os.path.join(concurrent, path), shallow=False))
+
+    def test_cli_leaves_link_index_alone(self):
+        for name in ("content", "static"):
+            shutil.copytree(os.path.join(ROOT, name), os.path.join(self.tmp.name, name))
+        shutil.copy(os.path.join(ROOT, "template.html"), self.tmp.name)
+        links_path = os.path.join(self.tmp.name, main.LINK_INDEX_PATH)
+        os.makedirs(os.path.dirname(links_path))
+        with open(links_path, "w") as f:
+            f.write('{"pages": {"/": [["a", "/missing"]]}}')
+        command = [sys.executable, os.path.join(ROOT, "src", "main.py"), "--async", "--check-links"]
+        result = subprocess.run(command, cwd=self.tmp.name, check=True, capture_output=True, text=True)
+        self.assertNotIn("Link index", result.stdout)
+        with open(links_path) as f:
+            self.assertEqual(f.read(), '{"pages": {"/": [["a", "/missing"]]}}')
+
+    def test_spawned_workers_follow_fingerprints(self):
+        # Spawned workers start from a fresh interpreter, so they only know
+        # what the pool initializer hands them.
+        for name in ("content", "static"):
+            shutil.copytree(os.path.join(ROOT, name), os.path.join(self.tmp.name, name))
+        shutil.copy(os.path.join(ROOT, "template.html"), self.tmp.name)
+        code = (
+            "import multiprocessing, sys, main; multiprocessing.set_start_method('spawn'); "
+            "sys.argv = ['main.py', '--async', '--jobs', '2', '--fingerprint']; main.main()"
+        )
+        env = {**os.environ, "PYTHONPATH": os.path.join(ROOT, "src")}
+        subprocess.run([sys.executable, "-c", code], cwd=self.tmp.name, env=env, check=True, capture_output=True)
+        with open(os.path.join(self.tmp.name, "public", "index.html")) as f:
+            html = f.read()
+        self.assertNotIn('href="/index.css"', html)
+        self.assertRegex(html, r'href="/index\.\w+\.css"')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import stat
+import threading
+import unittest
+
+from atomicfile import atomic_write, replacing
+from fixtures import TempDirTestCase
+
+
+class TestAtomicFile(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.tmp.name, "out.json")
+
+    def test_concurrent_writers_never_share_a_temp_file(self):
+        errors = []
+
+        def write(text):
+            try:
+                for _ in range(50):
+                    with atomic_write(self.path) as f:
+                        f.write(text)
+            except OSError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(str(i) * 1000,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        with open(self.path) as f:
+            text = f.read()
+        self.assertEqual(text, text[0] * 1000)
+        self.assertEqual(os.listdir(self.tmp.name), ["out.json"])
+
+    def test_failed_write_keeps_the_old_file(self):
+        with atomic_write(self.path) as f:
+            f.write("old")
+        with self.assertRaises(ValueError), atomic_write(self.path) as f:
+            f.write("new")
+            raise ValueError
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "old")
+        self.assertEqual(os.listdir(self.tmp.name), ["out.json"])
+
+    def test_mode_matches_open(self):
+        plain = os.path.join(self.tmp.name, "plain.json")
+        with open(plain, "w") as f:
+            f.write("x")
+        with replacing(self.path) as tmp_path:
+            with open(tmp_path, "w") as f:
+                f.write("x")
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), stat.S_IMODE(os.stat(plain).st_mode))
+
+
+if __name__ == "__main__":
+    unittest.main()
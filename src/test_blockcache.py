@@ -0,0 +1,77 @@
+import os
+import unittest
+
+import helpers
+import main
+from blockcache import BlockCache, block_key
+from fixtures import TempDirTestCase
+
+MARKDOWN = "# Title\n\nSome **bold** text\n\n* one\n* two\n\n> quoted"
+
+
+class TestBlockCache(TempDirTestCase):
+    def test_cached_render_matches_uncached(self):
+        cache = BlockCache()
+        expected = main.markdown_to_html_node(MARKDOWN).to_html()
+        self.assertEqual(main.markdown_to_html_node(MARKDOWN, cache).to_html(), expected)
+        self.assertEqual((cache.hits, cache.misses), (0, 4))
+        self.assertEqual(main.markdown_to_html_node(MARKDOWN, cache).to_html(), expected)
+        self.assertEqual((cache.hits, cache.misses), (4, 4))
+
+    def test_lru_eviction(self):
+        cache = BlockCache(max_size=10)
+        cache.put("a", "aaaa")
+        cache.put("b", "bbbb")
+        cache.get("a")
+        cache.put("c", "cccc")
+        self.assertEqual(list(cache.entries), ["a", "c"])
+        self.assertEqual(cache.size, 8)
+
+    def test_persistence(self):
+        path = os.path.join(self.tmp.name, "blocks.json")
+        cache = BlockCache.load(path)
+        cache.put(block_key("text"), "<p><a href='/x'>text</a></p>", [("LINK", "/x")], ["text"])
+        cache.save()
+        self.assertEqual(
+            BlockCache.load(path).get(block_key("text")),
+            ("<p><a href='/x'>text</a></p>", [("LINK", "/x")], ["text"], {}),
+        )
+
+    def test_drain_and_merge(self):
+        worker = BlockCache()
+        worker.put("a", "<p>a</p>")
+        worker.get("a")
+        worker.get("b")
+        parent = BlockCache()
+        parent.merge(*worker.drain())
+        self.assertEqual((parent.hits, parent.misses, parent.get("a")), (1, 1, ("<p>a</p>", [], [], {})))
+        self.assertEqual(worker.drain(), ({}, 0, 0))
+
+    def test_cached_blocks_keep_links(self):
+        cache = BlockCache()
+        markdown = "# Title\n\nSee [home](/) and ![logo](/logo.png)"
+        for _ in range(2):
+            links = []
+            previous = helpers.collect_links(links)
+            try:
+                main.markdown_to_html_node(markdown, cache).to_html()
+            finally:
+                helpers.collect_links(previous)
+            self.assertEqual(links, [("LINK", "/"), ("IMAGE", "/logo.png")])
+        self.assertEqual(cache.hits, 2)
+
+    def test_cached_blocks_keep_text(self):
+        cache = BlockCache()
+        for _ in range(2):
+            text = []
+            previous = helpers.collect_text(text)
+            try:
+                main.markdown_to_html_node(MARKDOWN, cache).to_html()
+            finally:
+                helpers.collect_text(previous)
+            self.assertEqual(text, ["Title", "Some bold text", "one", "two", "quoted"])
+        self.assertEqual(cache.hits, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import contextlib
+import io
+import os
+import unittest
+
+import main
+from buildgraph import BuildGraph
+from fixtures import TempDirTestCase
+from template import Template
+
+
+class TestBuildGraph(TempDirTestCase):
+    def test_affected(self):
+        graph = BuildGraph()
+        graph.set_inputs("public/a.html", ["content/a.md", "template.html", "nav.html"])
+        graph.set_inputs("public/b.html", ["content/b.md", "template.html"])
+        self.assertEqual(graph.affected(["nav.html"]), {"public/a.html"})
+        self.assertEqual(graph.affected(["template.html"]), {"public/a.html", "public/b.html"})
+        graph.set_inputs("public/a.html", ["content/a.md", "template.html"])
+        self.assertEqual(graph.affected(["nav.html"]), set())
+        graph.remove("public/b.html")
+        self.assertEqual(graph.affected(["content/b.md"]), set())
+        self.assertEqual(graph.source("public/a.html"), "content/a.md")
+
+    def test_persistence(self):
+        path = os.path.join(self.tmp.name, "graph.json")
+        graph = BuildGraph(path)
+        graph.set_inputs("public/a.html", ["content/a.md", "template.html"])
+        graph.save()
+        self.assertEqual(BuildGraph.load(path).affected(["template.html"]), {"public/a.html"})
+
+    def test_record_page_static_references(self):
+        static = os.path.join(self.tmp.name, "static")
+        for name in ["index.css", os.path.join("images", "a.png")]:
+            self.write(os.path.join(static, name), "")
+        graph = BuildGraph(None, os.path.join(self.tmp.name, "public"), static)
+        template = Template("<link href='/index.css'>{{ Content }}", ["template.html"])
+        links = [("IMAGE", "../images/a.png"), ("LINK", "/missing.png"), ("LINK", "https://example.com/x.png")]
+        dest_path = os.path.join(self.tmp.name, "public", "post", "index.html")
+        graph.record_page("content/post/index.md", template, dest_path, links)
+        self.assertEqual(
+            graph.inputs[dest_path],
+            [
+                "content/post/index.md",
+                "template.html",
+                os.path.join(static, "images", "a.png"),
+                os.path.join(static, "index.css"),
+            ],
+        )
+
+
+class TestIncrementalGraph(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.manifest = os.path.join(self.tmp.name, ".cache", "manifest.json")
+        self.write(self.template, "<main>{{ Content }}</main>")
+        self.write(os.path.join(self.tmp.name, "partials", "nav.html"), "<nav>v1</nav>")
+        nav = "{{> ../../partials/nav.html }}{{ Content }}"
+        self.write(os.path.join(self.content, "docs", main.TEMPLATE_NAME), nav)
+        for name in [
+            "index.md",
+            os.path.join("blog", "index.md"),
+            os.path.join("docs", "a.md"),
+            os.path.join("docs", "b.md"),
+        ]:
+            self.write(os.path.join(self.content, name), f"# {name}\n\ntext")
+
+    def read(self, name):
+        with open(os.path.join(self.public, name)) as f:
+            return f.read()
+
+    def build(self, jobs=1):
+        with contextlib.redirect_stdout(io.StringIO()):
+            built = main.generate_pages_incremental(self.content, self.template, self.public, self.manifest, jobs)
+        return sorted(os.path.relpath(path, self.content) for path in built)
+
+    def test_partial_change_rebuilds_only_its_pages(self):
+        self.assertEqual(len(self.build()), 4)
+        self.assertTrue(self.read(os.path.join("docs", "a.html")).startswith("<nav>v1</nav>"))
+        self.assertTrue(self.read("index.html").startswith("<main>"))
+        self.write(os.path.join(self.tmp.name, "partials", "nav.html"), "<nav>v2</nav>")
+        self.assertEqual(self.build(), [os.path.join("docs", "a.md"), os.path.join("docs", "b.md")])
+        self.assertTrue(self.read(os.path.join("docs", "b.html")).startswith("<nav>v2</nav>"))
+        self.assertEqual(self.build(), [])
+
+    def test_graph_from_parallel_build(self):
+        self.build(jobs=2)
+        self.write(self.template, "<section>{{ Content }}</section>")
+        self.assertEqual(self.build(jobs=2), [os.path.join("blog", "index.md"), "index.md"])
+
+    def test_new_directory_template(self):
+        self.build()
+        self.write(os.path.join(self.content, "blog", main.TEMPLATE_NAME), "<blog>{{ Content }}</blog>")
+        self.assertEqual(self.build(), [os.path.join("blog", "index.md")])
+        os.remove(os.path.join(self.content, "blog", main.TEMPLATE_NAME))
+        self.assertEqual(self.build(), [os.path.join("blog", "index.md")])
+        self.assertTrue(self.read(os.path.join("blog", "index.html")).startswith("<main>"))
+
+
+if __name__ == "__main__":
+    unittest.main()
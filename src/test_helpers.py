@@ -1,3 +1,5 @@
+import io
+import random
 import unittest
 
 import helpers
@@ -59,6 +61,47 @@ class TestHelpers(unittest.TestCase):
         self.assertEqual(helpers.block_to_block_type("* This is a list item"), "unordered_list")
         self.assertEqual(helpers.block_to_block_type("1. This is a list item"), "ordered_list")
 
+    def test_block_to_block_type_mixed_lines(self):
+        self.assertEqual(helpers.block_to_block_type("1. one\n3. three"), "paragraph")
+        self.assertEqual(helpers.block_to_block_type("> quote\nnot a quote"), "paragraph")
+        self.assertEqual(helpers.block_to_block_type("* one\n- two\n+ three"), "unordered_list")
+        self.assertEqual(helpers.block_to_block_type("####### deep"), "heading")
+        self.assertEqual(helpers.block_to_block_type("#hashtag"), "paragraph")
+
+    def test_markdown_to_blocks(self):
+        markdown = "# Title\n\n\n  Some *text*\nmore text  \n\n* one\n* two\n\n  \n"
+        self.assertEqual(helpers.markdown_to_blocks(markdown), ["# Title", "Some *text*\nmore text", "* one\n* two"])
+
+    def test_fenced_code_keeps_blank_lines(self):
+        markdown = "Before\n\n```\ndef f():\n\n    return 1\n```\n\nAfter"
+        self.assertEqual(
+            helpers.markdown_to_typed_blocks(markdown),
+            [
+                ("paragraph", "Before"),
+                ("code", "```\ndef f():\n\n    return 1\n```"),
+                ("paragraph", "After"),
+            ],
+        )
+
+    def test_unclosed_fence_splits_at_blank_lines(self):
+        markdown = "Intro\n\n```\nunclosed\n\n## Section\n\n* a\n* b\n\nEnd."
+        expected = [
+            ("paragraph", "Intro"),
+            ("paragraph", "```\nunclosed"),
+            ("heading", "## Section"),
+            ("unordered_list", "* a\n* b"),
+            ("paragraph", "End."),
+        ]
+        self.assertEqual(helpers.markdown_to_typed_blocks(markdown), expected)
+        self.assertEqual(list(helpers.iter_typed_blocks(io.StringIO(markdown + "\n\n"))), expected)
+
+    def test_iter_typed_blocks_from_lines(self):
+        stream = io.StringIO("# Title\n\n> a\n> b\n\n1. x\n2. y\n")
+        self.assertEqual(
+            list(helpers.iter_typed_blocks(stream)),
+            [("heading", "# Title"), ("quote", "> a\n> b"), ("ordered_list", "1. x\n2. y")],
+        )
+
     def test_extract_title(self):
         self.assertEqual(helpers.extract_title("# This is a heading"), "This is a heading")
 
@@ -70,6 +113,62 @@ class TestHelpers(unittest.TestCase):
         with self.assertRaises(ValueError):
             helpers.extract_title("## This is a paragraph")
 
+    def test_text_to_textnodes_matches_split_cascade(self):
+        def cascade(text):
+            nodes = [TextNode(text, TextType.TEXT)]
+            for delimiter, text_type in [(r"\*\*", TextType.BOLD), (r"\*", TextType.ITALIC), ("`", TextType.CODE)]:
+                nodes = helpers.split_nodes_delimiter(nodes, delimiter, text_type)
+            return helpers.split_nodes_link(helpers.split_nodes_image(nodes))
+
+        rng = random.Random(0)
+        alphabet = list("ab *`![]()\n") + ["![a](b)", "[c](d)", "**"]
+        for _ in range(5000):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 25)))
+            self.assertEqual(helpers.text_to_textnodes(text), cascade(text), repr(text))
+
+    def test_text_to_textnodes_linked_image(self):
+        nodes = helpers.text_to_textnodes("[![alt](/img.png)](/page)")
+        self.assertEqual(
+            nodes,
+            [
+                TextNode("[", TextType.TEXT),
+                TextNode("alt", TextType.IMAGE, "/img.png"),
+                TextNode("](/page)", TextType.TEXT),
+            ],
+        )
+
+
+class TestInterning(unittest.TestCase):
+    def setUp(self):
+        self.interner = helpers.FragmentInterner(max_entries=16)
+        previous = helpers.use_interner(self.interner)
+        self.addCleanup(helpers.use_interner, previous)
+
+    def test_repeated_fragments_share_leaves(self):
+        first = helpers.text_to_children("see [docs](/docs) and **bold**")
+        second = helpers.text_to_children("[docs](/docs) again")
+        self.assertIs(first[1], second[0])
+        self.assertEqual(second[0].to_html(), "<a href='/docs'>docs</a>")
+        self.assertEqual(self.interner.counts(), (1, 5))
+
+    def test_matches_uninterned_output(self):
+        text = "a `x < y` [link](/a?b='c') and ![img](/i.png) " + "long plain text " * 4
+        helpers.use_interner(None)
+        expected = [node.to_html() for node in helpers.text_to_children(text)]
+        helpers.use_interner(self.interner)
+        self.assertEqual([node.to_html() for node in helpers.text_to_children(text)], expected)
+
+    def test_bounded_and_drained(self):
+        self.interner = helpers.FragmentInterner(max_entries=2)
+        helpers.use_interner(self.interner)
+        for i in range(5):
+            helpers.text_to_children(f"**{i}**")
+        self.assertEqual(self.interner.leaf.cache_info().currsize, 2)
+        self.assertEqual(self.interner.drain(), (0, 5))
+        self.assertEqual(self.interner.drain(), (0, 0))
+        self.interner.merge(3, 1)
+        self.assertIn("3 hits, 6 misses", self.interner.stats())
+
 
 if __name__ == "__main__":
     unittest.main()
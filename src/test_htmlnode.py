@@ -1,6 +1,7 @@
+import io
 import unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import HTMLNode, LeafNode, ParentNode, RawNode
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -13,6 +14,17 @@ class TestHTMLNode(unittest.TestCase):
         node = HTMLNode("div", "Hello, world!", props={"class": "test"})
         self.assertEqual(node.props_to_html(), "class='test'")
 
+    def test_props_to_html_escapes_values(self):
+        node = HTMLNode("a", "x", props={"href": "/search?q='a'&b=<c>", "title": 'say "hi"'})
+        self.assertEqual(
+            node.props_to_html(),
+            "href='/search?q=&#x27;a&#x27;&amp;b=&lt;c&gt;' title='say &quot;hi&quot;'",
+        )
+
+    def test_props_to_html_unhashable_value(self):
+        node = HTMLNode("div", "x", props={"class": ["a", "b"]})
+        self.assertEqual(node.props_to_html(), "class='[&#x27;a&#x27;, &#x27;b&#x27;]'")
+
     def test_repr(self):
         node = HTMLNode("div", "Hello, world!", props={"class": "test"})
         self.assertEqual(
@@ -28,6 +40,18 @@ class TestHTMLNode(unittest.TestCase):
         node = LeafNode("div", "Hello, world!")
         self.assertEqual(node.to_html(), "<div>Hello, world!</div>")
 
+    def test_leaf_node_escapes_text(self):
+        self.assertEqual(LeafNode("code", "a < b && c > d").to_html(), "<code>a &lt; b &amp;&amp; c &gt; d</code>")
+        self.assertEqual(LeafNode(None, "it's <b>").to_html(), "it's &lt;b&gt;")
+
+    def test_raw_node_is_not_escaped(self):
+        node = ParentNode("div", [RawNode("<p>&amp;</p>"), LeafNode(None, "&")])
+        self.assertEqual(node.to_html(), "<div><p>&amp;</p>&amp;</div>")
+
+    def test_parent_node_props(self):
+        node = ParentNode("div", [LeafNode("span", "x")], {"class": "note"})
+        self.assertEqual(node.to_html(), "<div class='note'><span>x</span></div>")
+
     def test_leaf_node_repr(self):
         node = LeafNode("div", "Hello, world!")
         self.assertEqual(
@@ -56,6 +80,29 @@ class TestHTMLNode(unittest.TestCase):
         node = ParentNode("div", [ParentNode("span", [LeafNode("span", "Hello, world!")])])
         self.assertEqual(node.to_html(), "<div><span><span>Hello, world!</span></span></div>")
 
+    def test_iter_html(self):
+        node = ParentNode("ul", [ParentNode("li", [LeafNode("b", "one")]), ParentNode("li", [LeafNode(None, "two")])])
+        self.assertEqual(
+            list(node.iter_html()), ["<ul>", "<li>", "<b>one</b>", "</li>", "<li>", "two", "</li>", "</ul>"]
+        )
+
+    def test_write_html(self):
+        node = ParentNode("div", [ParentNode("p", [LeafNode("i", "Hello"), LeafNode(None, ", world!")])])
+        stream = io.StringIO()
+        node.write_html(stream)
+        self.assertEqual(stream.getvalue(), node.to_html())
+        self.assertEqual(stream.getvalue(), "<div><p><i>Hello</i>, world!</p></div>")
+
+    def test_deeply_nested_to_html(self):
+        node = LeafNode(None, "x")
+        for _ in range(200):
+            node = ParentNode("span", [node])
+        self.assertEqual(node.to_html(), "<span>" * 200 + "x" + "</span>" * 200)
+
+    def test_no_instance_dict(self):
+        for node in [LeafNode("b", "Hello"), ParentNode("p", [LeafNode("b", "Hello")])]:
+            self.assertFalse(hasattr(node, "__dict__"))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,55 @@
+import os
+import unittest
+
+import main
+from fixtures import TempDirTestCase
+from linkindex import LinkIndex, normalize_url
+
+
+class TestLinkIndex(TempDirTestCase):
+    def test_normalize_url(self):
+        self.assertEqual(normalize_url("/blog"), "/blog/")
+        self.assertEqual(normalize_url("/blog/index.html"), "/blog/")
+        self.assertEqual(normalize_url("/images/a.png"), "/images/a.png")
+        self.assertEqual(normalize_url("/blog#top"), "/blog/")
+
+    def test_backlinks_follow_page_updates(self):
+        index = LinkIndex("public")
+        index.set_page("/", [("LINK", "/blog"), ("LINK", "https://example.com")])
+        index.set_page("/about/", [("LINK", "../blog/index.html")])
+        self.assertEqual(index.pages_linking_to("/blog"), {"/", "/about/"})
+        index.set_page("/", [])
+        self.assertEqual(index.pages_linking_to("/blog/"), {"/about/"})
+        index.remove_page("/about/")
+        self.assertEqual(index.backlinks, {})
+
+    def test_dead_links(self):
+        self.write(os.path.join("images", "a.png"), "")
+        index = LinkIndex(self.tmp.name)
+        index.set_page("/", [("LINK", "/blog"), ("IMAGE", "/images/a.png"), ("IMAGE", "/images/b.png")])
+        index.set_page("/blog/", [("LINK", "/missing")])
+        self.assertEqual(index.dead_links(), [("/", "/images/b.png"), ("/blog/", "/missing/")])
+
+    def test_persistence(self):
+        path = os.path.join(self.tmp.name, "links.json")
+        index = LinkIndex("public", path)
+        index.set_page("/", [("LINK", "/blog")])
+        index.save()
+        loaded = LinkIndex.load("public", path)
+        self.assertEqual(loaded.links_from("/"), [("LINK", "/blog")])
+        self.assertEqual(loaded.pages_linking_to("/blog/"), {"/"})
+
+    def test_write_page_records_links(self):
+        source = os.path.join(self.tmp.name, "index.md")
+        self.write(source, "# Home\n\nSee [the blog](/blog) and ![a cat](/cat.png)\n")
+        index = LinkIndex(self.tmp.name)
+        main.use_link_index(index)
+        try:
+            main.write_page(source, main.Template("{{ Content }}"), os.path.join(self.tmp.name, "index.html"))
+        finally:
+            main.use_link_index(None)
+        self.assertEqual(index.links_from("/"), [("LINK", "/blog"), ("IMAGE", "/cat.png")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,20 @@
+import contextlib
+import filecmp
+import io
+import os
+import subprocess
+import sys
 import unittest
 
 import helpers
+import main
+from blockcache import BlockCache
+from fixtures import TempDirTestCase
+from template import Template
 from textnode import TextNode, TextType
 
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 
 class TestMain(unittest.TestCase):
     def test_text_node_to_html_node(self):
@@ -55,5 +67,242 @@ class TestMain(unittest.TestCase):
         self.assertEqual(len(nodes), 10)
 
 
+class TestStreaming(unittest.TestCase):
+    def setUp(self):
+        self.template = Template("<title>{{ Title }}</title><article>{{ Content }}</article>")
+        with open(os.path.join(ROOT, "content", "majesty", "index.md")) as f:
+            self.markdown = f.read()
+
+    def stream(self, markdown, cache=None):
+        main.use_block_cache(cache)
+        self.addCleanup(main.use_block_cache, None)
+        buffer = io.StringIO()
+        main.write_streamed_page(buffer, io.StringIO(markdown), self.template)
+        return buffer.getvalue()
+
+    def test_streamed_page_matches_rendered(self):
+        expected = main.render_page(self.markdown, self.template)
+        self.assertEqual(self.stream(self.markdown), expected)
+        self.assertEqual(self.stream(self.markdown, BlockCache()), expected)
+
+    def test_page_is_escaped(self):
+        markdown = "# Q&A\n\nIs 1 < 2? See [it's here](/faq?a=1&b='2')"
+        expected = (
+            "<title>Q&amp;A</title><article><div><h1 id='qa'>Q&amp;A</h1><p>Is 1 &lt; 2? See "
+            "<a href='/faq?a=1&amp;b=&#x27;2&#x27;'>it's here</a></p></div></article>"
+        )
+        self.assertEqual(main.render_page(markdown, self.template), expected)
+        self.assertEqual(self.stream(markdown), expected)
+        self.assertEqual(self.stream(markdown, BlockCache()), expected)
+
+    def test_toc_slot(self):
+        markdown = "# Intro\n\n## Setup\n\ntext\n\n## Setup\n\n### `main.py`"
+        expected = (
+            "<nav><ul><li><a href='#intro'>Intro</a><ul><li><a href='#setup'>Setup</a></li>"
+            "<li><a href='#setup-1'>Setup</a><ul><li><a href='#mainpy'>main.py</a></li></ul></li></ul></li></ul></nav>"
+            "<div><h1 id='intro'>Intro</h1><h2 id='setup'>Setup</h2><p>text</p><h2 id='setup-1'>Setup</h2>"
+            "<h3 id='mainpy'><code>main.py</code></h3></div>"
+        )
+        self.template = Template("<nav>{{ TOC }}</nav>{{ Content }}")
+        self.assertEqual(main.render_page(markdown, self.template), expected)
+        self.assertEqual(self.stream(markdown), expected)
+        cache = BlockCache()
+        self.assertEqual(self.stream(markdown, cache), expected)
+        self.assertEqual(self.stream(markdown, cache), expected)
+        # The TOC slot after the content is filled without buffering the page.
+        self.template = Template("{{ Content }}<nav>{{ TOC }}</nav>")
+        self.assertFalse(main.toc_before_content(self.template))
+        html = self.stream("# Title\n\nBody")
+        self.assertEqual(
+            html,
+            "<div><h1 id='title'>Title</h1><p>Body</p></div><nav><ul><li><a href='#title'>Title</a></li></ul></nav>",
+        )
+
+    def test_read_title_lines(self):
+        lines = iter(io.StringIO("#\n\n  Title\n\nBody\n"))
+        self.assertEqual(main.read_title_lines(lines), ["#\n", "\n", "  Title\n"])
+        self.assertEqual(next(lines), "\n")
+
+    def test_streamed_page_errors(self):
+        with self.assertRaises(ValueError):
+            self.stream("no title")
+        with self.assertRaises(ValueError):
+            self.stream("")
+
+
+class TestParallelBuild(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(ROOT, "content")
+        self.template = os.path.join(ROOT, "template.html")
+
+    def build(self, dest, jobs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.generate_pages_recursive(self.content, self.template, dest, jobs=jobs)
+
+    def test_parallel_matches_serial(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        parallel = os.path.join(self.tmp.name, "parallel")
+        self.build(serial, 1)
+        self.build(parallel, 2)
+        for path in ["index.html", os.path.join("majesty", "index.html")]:
+            self.assertTrue(filecmp.cmp(os.path.join(serial, path), os.path.join(parallel, path), shallow=False))
+
+    def test_parallel_collects_errors(self):
+        bad = os.path.join(self.tmp.name, "bad.md")
+        self.write(bad, "no title here")
+        good = os.path.join(self.content, "index.md")
+        pages = [
+            (bad, os.path.join(self.tmp.name, "out", "bad.html")),
+            (good, os.path.join(self.tmp.name, "out", "index.html")),
+        ]
+        with contextlib.redirect_stdout(io.StringIO()):
+            with self.assertRaises(main.BuildError) as cm:
+                main.generate_pages_parallel(pages, self.template, workers=2, batch_size=1)
+        self.assertEqual([path for path, _ in cm.exception.errors], [bad])
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "out", "index.html")))
+
+
+class TestFingerprints(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(main.use_fingerprints, None)
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.write(self.template, '<link href="/index.css">{{ Content }}')
+
+    def names(self, digest):
+        return {"index.css": f"index.{digest}.css", os.path.join("images", "a.png"): f"images/a.{digest}.png"}
+
+    def test_asset_urls_are_rewritten(self):
+        main.use_fingerprints(self.names("abc"))
+        markdown = "# T\n\n![a](/images/a.png) [style](/index.css) [page](/other)"
+        html = main.render_page(markdown, main.load_template(self.template))
+        self.assertEqual(
+            html,
+            '<link href="/index.abc.css"><div><h1 id=\'t\'>T</h1><p><img src=\'/images/a.abc.png\' alt=\'a\'></img> '
+            "<a href='/index.abc.css'>style</a> <a href='/other'>page</a></p></div>",
+        )
+
+    def test_cached_blocks_follow_fingerprints(self):
+        cache = BlockCache()
+        main.use_block_cache(cache)
+        self.addCleanup(main.use_block_cache, None)
+        template = Template("{{ Content }}")
+        for digest in ["abc", "def"]:
+            main.use_fingerprints(self.names(digest))
+            self.assertIn(f"/images/a.{digest}.png", main.render_page("# T\n\n![a](/images/a.png)", template))
+
+    def test_cached_blocks_keep_unrelated_assets(self):
+        cache = BlockCache()
+        main.use_block_cache(cache)
+        self.addCleanup(main.use_block_cache, None)
+        template = Template("{{ Content }}")
+        names = self.names("abc")
+        main.use_fingerprints(names)
+        main.render_page("# T\n\n[style](/index.css)", template)
+        main.use_fingerprints({**names, os.path.join("images", "a.png"): "images/a.def.png"})
+        self.assertIn("/index.abc.css", main.render_page("# T\n\n[style](/index.css)", template))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_incremental_build_follows_fingerprints(self):
+        content, public = os.path.join(self.tmp.name, "content"), os.path.join(self.tmp.name, "public")
+        static = os.path.join(self.tmp.name, "static")
+        template = os.path.join(self.tmp.name, "plain.html")
+        files = {
+            template: "{{ Content }}",
+            os.path.join(static, "index.css"): "body {}",
+            os.path.join(content, "index.md"): "# Home\n\n[style](/index.css)",
+            os.path.join(content, "plain", "index.md"): "# Plain",
+            os.path.join(content, "docs", main.TEMPLATE_NAME): '<link href="/index.css">{{ Content }}',
+            os.path.join(content, "docs", "index.md"): "# Docs",
+        }
+        for path, text in files.items():
+            self.write(path, text)
+        manifest = os.path.join(self.tmp.name, ".cache", "manifest.json")
+
+        def build(names):
+            main.use_fingerprints(names)
+            with contextlib.redirect_stdout(io.StringIO()):
+                built = main.generate_pages_incremental(content, template, public, manifest, static_path=static)
+            return sorted(os.path.relpath(path, content) for path in built)
+
+        self.assertEqual(len(build(self.names("abc"))), 3)
+        self.assertEqual(build(None), [os.path.join("docs", "index.md"), "index.md"])
+        with open(os.path.join(public, "index.html")) as f:
+            self.assertIn("href='/index.css'", f.read())
+        self.assertEqual(build(None), [])
+
+    def test_incremental_build_follows_one_asset(self):
+        content, public = os.path.join(self.tmp.name, "content"), os.path.join(self.tmp.name, "public")
+        static = os.path.join(self.tmp.name, "static")
+        template = os.path.join(self.tmp.name, "plain.html")
+        files = {
+            template: "{{ Content }}",
+            os.path.join(static, "index.css"): "body {}",
+            os.path.join(static, "images", "a.png"): "png",
+            os.path.join(content, "index.md"): "# Home\n\n[style](/index.css)",
+            os.path.join(content, "pics", "index.md"): "# Pics\n\n![a](/images/a.png)",
+        }
+        for path, text in files.items():
+            self.write(path, text)
+        manifest = os.path.join(self.tmp.name, ".cache", "manifest.json")
+
+        def build(names):
+            main.use_fingerprints(names)
+            with contextlib.redirect_stdout(io.StringIO()):
+                built = main.generate_pages_incremental(content, template, public, manifest, static_path=static)
+            return sorted(os.path.relpath(path, content) for path in built)
+
+        names = self.names("abc")
+        self.assertEqual(len(build(names)), 2)
+        self.assertEqual(build({**names, os.path.join("images", "a.png"): "images/a.def.png"}), [
+            os.path.join("pics", "index.md")
+        ])
+        with open(os.path.join(public, "pics", "index.html")) as f:
+            self.assertIn("/images/a.def.png", f.read())
+
+
+class TestPageContext(TempDirTestCase):
+    def test_path_is_escaped(self):
+        path = os.path.join(self.tmp.name, "Q&A <it's \"new\">.md")
+        self.write(path, "# Q")
+        template = Template("<a href='/edit/{{ Path }}'>{{ Path }}</a>")
+        html = main.render_source(template, path, "# Q")
+        self.assertIn("Q&amp;A &lt;it&#x27;s &quot;new&quot;&gt;.md'>", html)
+        self.assertNotIn("<it", html)
+
+
+class TestStartup(TempDirTestCase):
+    def test_import_is_lazy(self):
+        code = "import sys, main; print(' '.join(sorted(sys.modules)))"
+        src = os.path.join(ROOT, "src")
+        output = subprocess.run([sys.executable, "-c", code], cwd=src, check=True, capture_output=True, text=True)
+        modules = output.stdout.split()
+        lazy = ["asyncbuild", "watch", "concurrent.futures.process", "shutil", "glob", "sharding", "searchindex"]
+        lazy += ["linkindex", "profiling", "buildgraph", "toc", "blockcache", "manifest", "hashlib", "array"]
+        lazy += ["urllib.parse"]
+        for name in lazy:
+            self.assertNotIn(name, modules)
+
+    def test_single_page(self):
+        self.write(os.path.join("content", "index.md"), "# Home\n\nHello")
+        self.write("template.html", "{{ Title }}|{{ Content }}")
+        self.write(os.path.join("content", "blog", "index.md"), "# Blog")
+        self.write(os.path.join("content", "blog", main.TEMPLATE_NAME), "<blog>{{ Content }}</blog>")
+        script = os.path.join(ROOT, "src", "main.py")
+        for page in ["index.md", os.path.join("blog", "index.md")]:
+            subprocess.run(
+                [sys.executable, script, "--page", os.path.join("content", page)],
+                cwd=self.tmp.name,
+                check=True,
+                capture_output=True,
+            )
+        with open(os.path.join(self.tmp.name, "public", "index.html")) as f:
+            self.assertEqual(f.read(), "Home|<div><h1 id='home'>Home</h1><p>Hello</p></div>")
+        with open(os.path.join(self.tmp.name, "public", "blog", "index.html")) as f:
+            self.assertEqual(f.read(), "<blog><div><h1 id='blog'>Blog</h1></div></blog>")
+        self.assertEqual(sorted(os.listdir(os.path.join(self.tmp.name, "public"))), ["blog", "index.html"])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,98 @@
+import contextlib
+import io
+import os
+import unittest
+
+import main
+from fixtures import TempDirTestCase
+from manifest import Manifest
+
+TEMPLATE = "<title>{{ Title }}</title><article>{{ Content }}</article>"
+
+
+class TestManifest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.manifest = os.path.join(self.tmp.name, "manifest.json")
+        self.write(self.template, TEMPLATE)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nHello")
+        self.write(os.path.join(self.content, "post", "index.md"), "# Post\n\nWorld")
+
+    def build(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            built = main.generate_pages_incremental(self.content, self.template, self.public, self.manifest)
+        return sorted(os.path.relpath(path, self.content) for path in built)
+
+    def test_changed(self):
+        manifest = Manifest.load(self.manifest)
+        self.assertTrue(manifest.changed(self.template))
+        manifest.save()
+        self.assertFalse(Manifest.load(self.manifest).changed(self.template))
+
+    def test_first_build_builds_everything(self):
+        self.assertEqual(self.build(), ["index.md", os.path.join("post", "index.md")])
+        self.assertTrue(os.path.exists(os.path.join(self.public, "post", "index.html")))
+
+    def test_noop_rebuild(self):
+        self.build()
+        self.assertEqual(self.build(), [])
+
+    def test_rebuilds_only_changed_page(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nHello again")
+        self.assertEqual(self.build(), ["index.md"])
+        with open(os.path.join(self.public, "index.html")) as f:
+            self.assertIn("Hello again", f.read())
+
+    def test_template_change_rebuilds_everything(self):
+        self.build()
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(len(self.build()), 2)
+
+    def test_missing_output_is_rebuilt(self):
+        self.build()
+        os.remove(os.path.join(self.public, "index.html"))
+        self.assertEqual(self.build(), ["index.md"])
+
+    def test_deleted_source_removes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, "post", "index.md"))
+        self.assertEqual(self.build(), [])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "post", "index.html")))
+
+    def test_failed_page_does_not_hide_other_edits(self):
+        names = [os.path.join(f"post{i}", "index.md") for i in range(5)]
+        for name in names:
+            self.write(os.path.join(self.content, name), "# Old\n\nold")
+        self.build()
+        for name in names:
+            self.write(os.path.join(self.content, name), "# New\n\nnew")
+        self.write(os.path.join(self.content, names[0]), "no title")
+        with contextlib.redirect_stdout(io.StringIO()), self.assertRaises(main.BuildError) as cm:
+            main.generate_pages_incremental(self.content, self.template, self.public, self.manifest)
+        self.assertEqual([path for path, _ in cm.exception.errors], [os.path.join(self.content, names[0])])
+        self.write(os.path.join(self.content, names[0]), "# New\n\nnew")
+        self.assertEqual(self.build(), [names[0]])
+        for name in names:
+            with open(os.path.join(self.public, os.path.dirname(name), "index.html")) as f:
+                self.assertIn("<p>new</p>", f.read())
+
+    def test_deleted_asset_is_removed(self):
+        asset = os.path.join(self.public, "index.css")
+        self.write(asset, "body {}")
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.generate_pages_incremental(
+                self.content, self.template, self.public, self.manifest, static_outputs={asset}
+            )
+            main.generate_pages_incremental(
+                self.content, self.template, self.public, self.manifest, static_outputs=set()
+            )
+        self.assertFalse(os.path.exists(asset))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
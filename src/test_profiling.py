@@ -0,0 +1,67 @@
+import csv
+import json
+import os
+import unittest
+
+import helpers
+from fixtures import TempDirTestCase
+from htmlnode import LeafNode, ParentNode
+from profiling import STAGES, Profiler, count_html_nodes
+
+
+class TestProfiling(TempDirTestCase):
+    def test_count_html_nodes(self):
+        node = ParentNode("ul", [ParentNode("li", [LeafNode("b", "x"), LeafNode(None, "y")])])
+        self.assertEqual(count_html_nodes(node), 4)
+
+    def test_page_stages(self):
+        profiler = Profiler()
+        with profiler.page("a.md") as page:
+            with page.stage("read"):
+                pass
+        self.assertEqual([page.path for page in profiler.pages], ["a.md"])
+        self.assertEqual(set(profiler.pages[0].stages), set(STAGES))
+        self.assertGreater(profiler.pages[0].stages["read"], 0)
+
+    def test_instrument(self):
+        profiler = Profiler()
+        original = helpers.text_to_children
+        self.addCleanup(setattr, helpers, "text_to_children", original)
+        profiler.instrument(helpers, "text_to_children", "inline", count_nodes=True)
+
+        helpers.text_to_children("outside a page")
+        with profiler.page("a.md"):
+            helpers.paragraph_to_html_node("some **bold** text")
+        page = profiler.pages[0]
+        self.assertEqual(page.text_nodes, 3)
+        self.assertGreater(page.stages["inline"], 0)
+
+    def test_drain_and_merge(self):
+        worker = Profiler()
+        with worker.page("a.md") as page:
+            page.html_nodes = 5
+        parent = Profiler()
+        parent.merge(worker.drain())
+        self.assertEqual(worker.pages, [])
+        self.assertEqual(parent.pages[0].html_nodes, 5)
+
+    def test_write_report(self):
+        profiler = Profiler()
+        for path, seconds in [("fast.md", 0.1), ("slow.md", 0.5)]:
+            with profiler.page(path) as page:
+                page.stages["to_html"] = seconds
+        json_path = os.path.join(self.tmp.name, "report.json")
+        profiler.write_report(json_path, top=1)
+        with open(json_path) as f:
+            report = json.load(f)
+        self.assertEqual(report["pages"], 2)
+        self.assertEqual([page["path"] for page in report["slowest"]], ["slow.md"])
+
+        csv_path = os.path.join(self.tmp.name, "report.csv")
+        profiler.write_report(csv_path)
+        with open(csv_path, newline="") as f:
+            self.assertEqual([row["path"] for row in csv.DictReader(f)], ["slow.md", "fast.md"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import contextlib
+import io
+import os
+import unittest
+from array import array
+
+import main
+from fixtures import TempDirTestCase
+from searchindex import SearchIndex, decode_postings, encode_postings, segment_of, term_positions, tokenize
+
+
+class TestSearchIndex(TempDirTestCase):
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Hello, World! It's 2024"), ["hello", "world", "it", "s", "2024"])
+        self.assertEqual(term_positions(["a b", "b"]), {"a": [0], "b": [1, 2]})
+
+    def test_postings_round_trip(self):
+        postings = [(0, array("I", [3, 10])), (4, array("I", [0])), (5, array("I", [7, 8, 100]))]
+        encoded = encode_postings(postings)
+        self.assertEqual(encoded, [0, 2, 3, 7, 4, 1, 0, 1, 3, 7, 1, 92])
+        self.assertEqual(decode_postings(encoded), postings)
+
+    def test_persistence(self):
+        path = os.path.join(self.tmp.name, "search.json")
+        index = SearchIndex(self.tmp.name, path)
+        index.set_page("/b/", "B", term_positions(["shire hobbit shire"]))
+        index.set_page("/", "Home", term_positions(["hobbit"]))
+        index.save()
+        loaded = SearchIndex.load(self.tmp.name, path)
+        self.assertEqual((len(loaded), "/b/" in loaded, "/c/" in loaded), (2, True, False))
+        self.assertEqual(loaded.positions("/b/", "shire"), [0, 2])
+        self.assertEqual(loaded.search("shire"), ["/b/"])
+        self.assertEqual(loaded.search("hobbit"), ["/", "/b/"])
+        self.assertEqual(loaded.search("Shire HOBBIT"), ["/b/"])
+        self.assertEqual(loaded.search("mordor"), [])
+        self.assertEqual(loaded.pages, index.pages)
+
+    def test_update_rewrites_only_touched_segments(self):
+        path = os.path.join(self.tmp.name, "search.json")
+        index = SearchIndex(self.tmp.name, path)
+        urls = [f"/{i}/" for i in range(20)]
+        for url in urls:
+            index.set_page(url, url, term_positions([url]))
+        self.assertTrue(index.save())
+
+        def inode(name):
+            return os.stat(os.path.join(self.tmp.name, name)).st_ino
+
+        inodes = {name: inode(name) for name in os.listdir(self.tmp.name)}
+
+        loaded = SearchIndex.load(self.tmp.name, path)
+        self.assertFalse(loaded.save())
+        loaded.set_page("/3/", "Three", term_positions(["three"]))
+        loaded.remove_page("/missing/")
+        self.assertEqual(loaded.loaded, {segment_of("/3/")})
+        self.assertTrue(loaded.save())
+        rewritten = {name for name in inodes if inode(name) != inodes[name]}
+        self.assertEqual(rewritten, {"search.json", f"search.{segment_of('/3/')}.json"})
+        self.assertEqual(SearchIndex.load(self.tmp.name, path).search("three"), ["/3/"])
+        self.assertEqual(len(SearchIndex.load(self.tmp.name, path)), 20)
+
+    def test_write_page_indexes_text(self):
+        markdown = "# The Shire\n\nSee [the hobbits](/hobbits) and **second** breakfast\n"
+        self.write(os.path.join("content", "blog", "index.md"), markdown)
+        template = os.path.join(self.tmp.name, "template.html")
+        self.write(template, "{{ Content }}")
+        public = os.path.join(self.tmp.name, "public")
+        index = SearchIndex(public, os.path.join(public, "search.json"))
+        main.use_search_index(index)
+        self.addCleanup(main.use_search_index, None)
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.generate_pages_recursive(os.path.join(self.tmp.name, "content"), template, public, jobs=2)
+        self.assertEqual(index.pages["/blog/"][0], "The Shire")
+        self.assertEqual(index.positions("/blog/", "the"), [0, 3])
+        self.assertEqual(index.positions("/blog/", "second"), [6])
+
+        main.forget_page(os.path.join(public, "blog", "index.html"))
+        self.assertEqual(index.pages, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import gzip
+import http.client
+import os
+import threading
+import unittest
+
+import serve
+from fixtures import TempDirTestCase
+
+
+class TestServe(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("index.html", b"<p>home</p>")
+        self.write("blog/index.html", b"<p>blog</p>")
+        self.cache = serve.FileCache()
+        self.server = serve.make_server(self.tmp.name, 0, self.cache, quiet=True)
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.connection = http.client.HTTPConnection("localhost", self.server.server_address[1], timeout=5)
+        self.addCleanup(self.connection.close)
+
+    def write(self, name, data, mtime_ns=None):
+        path = os.path.join(self.tmp.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        if mtime_ns is not None:
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+        return path
+
+    def get(self, path, headers=None, method="GET"):
+        self.connection.request(method, path, headers=headers or {})
+        response = self.connection.getresponse()
+        return response, response.read()
+
+    def test_keep_alive_and_cache(self):
+        response, body = self.get("/")
+        self.assertEqual((response.status, body), (200, b"<p>home</p>"))
+        self.assertEqual(response.getheader("Content-Type"), "text/html; charset=utf-8")
+        sock = self.connection.sock
+        response, body = self.get("/index.html")
+        self.assertEqual(body, b"<p>home</p>")
+        self.assertIs(self.connection.sock, sock)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_changed_file_is_reread(self):
+        self.get("/")
+        self.write("index.html", b"<p>changed</p>", mtime_ns=10**18)
+        self.assertEqual(self.get("/")[1], b"<p>changed</p>")
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_etag(self):
+        response, _ = self.get("/")
+        tag = response.getheader("ETag")
+        response, body = self.get("/", {"If-None-Match": tag})
+        self.assertEqual((response.status, body), (304, b""))
+        self.write("index.html", b"<p>changed</p>", mtime_ns=10**18)
+        response, _ = self.get("/", {"If-None-Match": tag})
+        self.assertEqual(response.status, 200)
+
+    def test_precompressed(self):
+        path = os.path.join(self.tmp.name, "index.html")
+        mtime_ns = os.stat(path).st_mtime_ns
+        self.write("index.html.gz", gzip.compress(b"<p>home</p>"), mtime_ns=mtime_ns)
+        response, body = self.get("/", {"Accept-Encoding": "br;q=1, gzip"})
+        self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(gzip.decompress(body), b"<p>home</p>")
+        self.assertNotEqual(response.getheader("ETag"), self.get("/")[0].getheader("ETag"))
+
+        self.assertIsNone(self.get("/", {"Accept-Encoding": "gzip;q=0"})[0].getheader("Content-Encoding"))
+        # A sibling older than its source is stale and ignored.
+        self.write("index.html.gz", gzip.compress(b"<p>old</p>"), mtime_ns=mtime_ns - 1)
+        response, body = self.get("/", {"Accept-Encoding": "gzip"})
+        self.assertEqual((response.getheader("Content-Encoding"), body), (None, b"<p>home</p>"))
+
+    def test_large_file_uses_sendfile(self):
+        data = os.urandom(serve.SENDFILE_THRESHOLD + 1)
+        self.write("big.bin", data)
+        response, body = self.get("/big.bin")
+        self.assertEqual((response.getheader("Content-Type"), body), ("application/octet-stream", data))
+        self.assertEqual(len(self.cache.entries), 0)
+        response, body = self.get("/big.bin", method="HEAD")
+        self.assertEqual((response.getheader("Content-Length"), body), (str(len(data)), b""))
+
+    def test_directory_redirect_and_missing(self):
+        response, _ = self.get("/blog")
+        self.assertEqual((response.status, response.getheader("Location")), (301, "/blog/"))
+        self.assertEqual(self.get("/blog/")[1], b"<p>blog</p>")
+        self.assertEqual(self.get("/missing.html")[0].status, 404)
+        self.assertEqual(self.get("/../../etc/passwd")[0].status, 404)
+
+    def test_cache_eviction(self):
+        cache = serve.FileCache(max_size=10)
+        for name in ("a", "b", "c"):
+            path = self.write(name, b"12345")
+            cache.get(path, os.stat(path))
+        self.assertEqual([os.path.basename(path) for path in cache.entries], ["b", "c"])
+        self.assertEqual(cache.size, 10)
+
+    def test_accepted_encodings(self):
+        self.assertEqual(serve.accepted_encodings("gzip, deflate, br;q=0"), {"gzip", "deflate"})
+        self.assertEqual(serve.accepted_encodings(""), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
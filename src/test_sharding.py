@@ -0,0 +1,112 @@
+import contextlib
+import filecmp
+import io
+import os
+import subprocess
+import sys
+import unittest
+
+import main
+import sharding
+from fixtures import TempDirTestCase
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestSharding(TempDirTestCase):
+    def make_site(self):
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        for i in range(12):
+            self.write(os.path.join("content", f"post{i}", "index.md"), f"# Post {i}\n\nBody {i}")
+            self.write(os.path.join("static", f"asset{i}.css"), f"/* {i} */")
+
+    def test_shard_index_is_stable(self):
+        self.assertEqual(sharding.shard_index("blog/index.md", 8), sharding.shard_index("blog/index.md", 8))
+        self.assertEqual(sharding.shard_index(os.path.join("blog", "index.md"), 8), 6)
+
+    def test_shards_partition_paths(self):
+        paths = [f"post{i}/index.md" for i in range(400)]
+        shards = [[path for path in paths if sharding.shard_index(path, 4) == index] for index in range(1, 5)]
+        self.assertEqual(sorted(sum(shards, [])), sorted(paths))
+        for shard in shards:
+            self.assertGreater(len(shard), 60)
+
+    def test_merged_shards_match_full_build(self):
+        self.make_site()
+        content, static = os.path.join(self.tmp.name, "content"), os.path.join(self.tmp.name, "static")
+        template = os.path.join(self.tmp.name, "template.html")
+        full, merged = os.path.join(self.tmp.name, "full"), os.path.join(self.tmp.name, "merged")
+        with contextlib.redirect_stdout(io.StringIO()):
+            assets_out = main.assets.sync_static(static, full)
+            main.generate_pages_recursive(content, template, full)
+            shard_dirs = []
+            for index in range(1, 4):
+                shard_dirs.append(sharding.shard_dir(os.path.join(self.tmp.name, "shards"), (index, 3)))
+                main.generate_shard(content, template, static, shard_dirs[-1], (index, 3))
+            outputs = main.merge_shards(shard_dirs, merged)
+        self.assertEqual(len(outputs), len(assets_out) + 12)
+        comparison = filecmp.dircmp(full, merged)
+        self.assertEqual((comparison.left_only, comparison.right_only, comparison.diff_files), ([], [], []))
+
+    def test_more_shards_than_files(self):
+        self.write("template.html", "{{ Content }}")
+        self.write(os.path.join("content", "index.md"), "# Home")
+        self.write(os.path.join("content", "about", "index.md"), "# About")
+        content, static = os.path.join(self.tmp.name, "content"), os.path.join(self.tmp.name, "static")
+        template = os.path.join(self.tmp.name, "template.html")
+        full, merged = os.path.join(self.tmp.name, "full"), os.path.join(self.tmp.name, "merged")
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.generate_pages_recursive(content, template, full)
+            shard_dirs = [sharding.shard_dir(os.path.join(self.tmp.name, "shards"), (i, 8)) for i in range(1, 9)]
+            sizes = [
+                len(main.generate_shard(content, template, static, directory, (index, 8)))
+                for index, directory in enumerate(shard_dirs, 1)
+            ]
+            main.merge_shards(shard_dirs, merged)
+        self.assertIn(0, sizes)
+        comparison = filecmp.dircmp(full, merged)
+        self.assertEqual((comparison.left_only, comparison.right_only, comparison.diff_files), ([], [], []))
+
+    def test_merge_reports_collisions_and_missing_shards(self):
+        for index in (1, 2):
+            directory = os.path.join(self.tmp.name, f"{index}-of-3")
+            self.write(os.path.join(directory, "index.html"), "x")
+            sharding.write_manifest(directory, (index, 3), {os.path.join(directory, "index.html")})
+        with self.assertRaises(main.BuildError) as cm:
+            main.merge_shards([os.path.join(self.tmp.name, f"{index}-of-3") for index in (1, 2)], self.tmp.name)
+        self.assertEqual([path for path, _ in cm.exception.errors], ["index.html", "3/3"])
+
+    def test_cli_runs_shards_as_separate_processes(self):
+        self.make_site()
+        script = os.path.join(ROOT, "src", "main.py")
+        processes = [
+            subprocess.Popen(
+                [sys.executable, script, "--shard", f"{index}/3", "--block-cache", "--fingerprint"],
+                cwd=self.tmp.name,
+                stdout=subprocess.DEVNULL,
+            )
+            for index in range(1, 4)
+        ]
+        self.assertEqual([process.wait() for process in processes], [0, 0, 0])
+        caches = sorted(os.listdir(os.path.join(self.tmp.name, ".cache")))
+        expected = [f"{name}.{index}-of-3.json" for name in ("assets", "blocks") for index in range(1, 4)]
+        self.assertEqual(caches, expected)
+        shard_dirs = [os.path.join("shards", f"{index}-of-3") for index in range(1, 4)]
+        command = [sys.executable, script, "--merge", *shard_dirs]
+        subprocess.run(command, cwd=self.tmp.name, check=True, stdout=subprocess.DEVNULL)
+        public = os.path.join(self.tmp.name, "public")
+        self.assertEqual(len(os.listdir(public)), 24)
+        with open(os.path.join(public, "post3", "index.html")) as f:
+            self.assertEqual(f.read(), "<title>Post 3</title><div><h1 id='post-3'>Post 3</h1><p>Body 3</p></div>")
+
+    def test_shards_ignore_link_checks(self):
+        self.make_site()
+        script = os.path.join(ROOT, "src", "main.py")
+        for command in (["--shard", "1/1", "--check-links"], ["--merge", "shards/1-of-1", "--check-links"]):
+            subprocess.run([sys.executable, script, *command], cwd=self.tmp.name, check=True, capture_output=True)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, main.LINK_INDEX_PATH)))
+        self.assertEqual(len(os.listdir(os.path.join(self.tmp.name, "public"))), 24)
+
+
+if __name__ == "__main__":
+    unittest.main()
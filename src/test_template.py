@@ -0,0 +1,63 @@
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from htmlnode import LeafNode, ParentNode
+from template import Template, load_template
+
+
+class TestTemplate(TempDirTestCase):
+    def test_parse(self):
+        template = Template("<title>{{ Title }}</title><p>{{Content}}</p>")
+        self.assertEqual(template.literals, ["<title>", "</title><p>", "</p>"])
+        self.assertEqual(template.slots, [("Title", "{{ Title }}"), ("Content", "{{Content}}")])
+        self.assertEqual(template.names, {"Title", "Content"})
+
+    def test_render(self):
+        template = Template("<h1>{{ Title }}</h1>{{ Content }}<small>{{ Date }}</small>")
+        content = ParentNode("div", [LeafNode("b", "Hello")])
+        self.assertEqual(
+            template.render({"Title": "Home", "Content": content, "Date": "2024-01-01"}),
+            "<h1>Home</h1><div><b>Hello</b></div><small>2024-01-01</small>",
+        )
+
+    def test_render_repeated_slot(self):
+        template = Template("{{ Title }} | {{ Title }}")
+        self.assertEqual(template.render({"Title": "Home"}), "Home | Home")
+
+    def test_render_missing_slot_is_kept(self):
+        template = Template("<p>{{ Unknown }}</p>")
+        self.assertEqual(template.render({}), "<p>{{ Unknown }}</p>")
+
+    def test_load_template_cache(self):
+        path = os.path.join(self.tmp.name, "template.html")
+        self.write(path, "{{ Title }}")
+        first = load_template(path)
+        self.assertIs(load_template(path), first)
+
+        self.write(path, "<b>{{ Title }}</b>")
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+        self.assertEqual(load_template(path).render({"Title": "x"}), "<b>x</b>")
+
+    def test_includes(self):
+        path = os.path.join(self.tmp.name, "template.html")
+        partial = os.path.join(self.tmp.name, "partials", "head.html")
+        self.write(path, "{{> partials/head.html }}<main>{{ Content }}</main>")
+        self.write(partial, "<title>{{ Title }}</title>")
+        template = load_template(path)
+        self.assertEqual(template.render({"Title": "t", "Content": "c"}), "<title>t</title><main>c</main>")
+        self.assertEqual(template.dependencies, [path, partial])
+
+        self.write(partial, "<h1>{{ Title }}</h1>")
+        os.utime(partial, ns=(0, os.stat(partial).st_mtime_ns + 1))
+        self.assertEqual(load_template(path).render({"Title": "t", "Content": "c"}), "<h1>t</h1><main>c</main>")
+
+    def test_include_cycle(self):
+        path = os.path.join(self.tmp.name, "template.html")
+        self.write(path, "{{> template.html }}")
+        with self.assertRaises(ValueError):
+            load_template(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
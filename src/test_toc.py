@@ -0,0 +1,37 @@
+import unittest
+
+from toc import TableOfContents, slugify
+
+
+class TestTableOfContents(unittest.TestCase):
+    def test_slugify(self):
+        self.assertEqual(slugify("Hello, World!"), "hello-world")
+        self.assertEqual(slugify("  Q&A  "), "qa")
+        self.assertEqual(slugify("Über straße"), "über-straße")
+        self.assertEqual(slugify("snake_case and-dashes"), "snake_case-and-dashes")
+        self.assertEqual(slugify("?!"), "section")
+
+    def test_duplicate_ids(self):
+        toc = TableOfContents()
+        ids = [toc.add(2, text) for text in ("Notes", "Notes", "Notes 1", "Notes")]
+        self.assertEqual(ids, ["notes", "notes-1", "notes-1-1", "notes-2"])
+
+    def test_nesting(self):
+        toc = TableOfContents()
+        for level, text in [(1, "A"), (3, "B"), (2, "C"), (1, "D")]:
+            toc.add(level, text)
+        self.assertEqual(
+            "".join(toc),
+            "<ul><li><a href='#a'>A</a><ul><li><a href='#b'>B</a></li><li><a href='#c'>C</a></li></ul></li>"
+            "<li><a href='#d'>D</a></li></ul>",
+        )
+
+    def test_escaped_and_empty(self):
+        toc = TableOfContents()
+        self.assertEqual("".join(toc), "")
+        toc.add(2, "a < b")
+        self.assertEqual(toc.to_html_node().to_html(), "<ul><li><a href='#a-b'>a &lt; b</a></li></ul>")
+
+
+if __name__ == "__main__":
+    unittest.main()
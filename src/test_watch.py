@@ -0,0 +1,93 @@
+import contextlib
+import io
+import os
+import threading
+import unittest
+import urllib.request
+
+import main
+import watch
+from buildgraph import BuildGraph
+from fixtures import TempDirTestCase
+
+
+class TestWatch(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.write(self.template, "<body>{{ Content }}</body>")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nHello")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+
+    @property
+    def dirs(self):
+        return self.content, self.static, self.template, self.public
+
+    def apply(self, changed, removed=()):
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.apply_changes(set(changed), set(removed), *self.dirs)
+
+    def test_snapshot(self):
+        state = watch.snapshot([self.content, self.template])
+        self.assertEqual(set(state), {os.path.join(self.content, "index.md"), self.template})
+
+    def test_apply_changes(self):
+        page = os.path.join(self.content, "index.md")
+        css = os.path.join(self.static, "index.css")
+        self.apply([page, css])
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.css")))
+
+        self.apply([], [page, css])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.html")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.css")))
+
+    def test_template_change_rebuilds_pages(self):
+        self.apply([self.template])
+        with open(os.path.join(self.public, "index.html")) as f:
+            self.assertEqual(f.read(), "<body><div><h1 id='home'>Home</h1><p>Hello</p></div></body>")
+
+    def test_graph_limits_rebuilds(self):
+        partial = os.path.join(self.tmp.name, "nav.html")
+        self.write(partial, "<nav></nav>")
+        self.write(self.template, "<body>{{> nav.html }}{{ Content }}</body>")
+        self.write(os.path.join(self.content, "post.md"), "# Post\n\n![a](/index.css)")
+        main.use_build_graph(BuildGraph(None, self.public, self.static))
+        self.addCleanup(main.use_build_graph, None)
+        self.apply([os.path.join(self.content, "index.md"), os.path.join(self.content, "post.md")])
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            main.apply_changes({os.path.join(self.static, "index.css")}, set(), *self.dirs)
+        self.assertIn("post.md", output.getvalue())
+        self.assertNotIn("index.md", output.getvalue())
+
+        self.write(partial, "<nav>new</nav>")
+        self.apply([partial])
+        with open(os.path.join(self.public, "index.html")) as f:
+            self.assertEqual(f.read(), "<body><nav>new</nav><div><h1 id='home'>Home</h1><p>Hello</p></div></body>")
+
+    def test_serve_injects_reload_script(self):
+        self.apply([os.path.join(self.content, "index.md")])
+        notifier = watch.ReloadNotifier()
+        with contextlib.redirect_stderr(io.StringIO()):
+            server = watch.serve(self.public, 0, notifier)
+            self.addCleanup(server.shutdown)
+            self.addCleanup(server.server_close)
+            port = server.server_address[1]
+            with urllib.request.urlopen(f"http://localhost:{port}/") as response:
+                body = response.read()
+        page = b"<body><div><h1 id='home'>Home</h1><p>Hello</p></div>" + watch.RELOAD_SCRIPT + b"</body>"
+        self.assertEqual(body, page)
+
+    def test_notifier(self):
+        notifier = watch.ReloadNotifier()
+        threading.Timer(0.01, notifier.notify).start()
+        self.assertEqual(notifier.wait(0, timeout=5), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import functools
+import re
+from typing import Iterator
+
+from htmlnode import LeafNode, ParentNode
+
+_SLUG_STRIP_PATTERN = re.compile(r"[^\w\- ]")
+_SLUG_SPACE_PATTERN = re.compile(r" +")
+
+
+@functools.lru_cache(maxsize=4096)
+def slugify(text: str) -> str:
+    slug = _SLUG_STRIP_PATTERN.sub("", text.strip().lower())
+    return _SLUG_SPACE_PATTERN.sub("-", slug) or "section"
+
+
+class TableOfContents:
+    def __init__(self):
+        # (level, id, text) for every heading on the page, in document order.
+        self.entries: list[tuple[int, str, str]] = []
+        self.ids: set[str] = set()
+
+    def add(self, level: int, text: str) -> str:
+        base = anchor = slugify(text)
+        suffix = 1
+        while anchor in self.ids:
+            anchor = f"{base}-{suffix}"
+            suffix += 1
+        self.ids.add(anchor)
+        self.entries.append((level, anchor, text))
+        return anchor
+
+    def to_html_node(self) -> ParentNode | None:
+        if not self.entries:
+            return None
+        items: list[ParentNode] = []
+        # (level, list the next heading at that level is added to); the first
+        # heading sets the top level, deeper ones nest under the last item.
+        stack = [(self.entries[0][0], items)]
+        for level, anchor, text in self.entries:
+            while len(stack) > 1 and stack[-1][0] > level:
+                stack.pop()
+            depth, siblings = stack[-1]
+            if level > depth and siblings:
+                parent = siblings[-1].children
+                if parent[-1].tag != "ul":
+                    parent.append(ParentNode("ul", []))
+                siblings = parent[-1].children
+                stack.append((level, siblings))
+            siblings.append(ParentNode("li", [LeafNode("a", text, {"href": f"#{anchor}"})]))
+        return ParentNode("ul", items)
+
+    def __iter__(self) -> Iterator[str]:
+        # Rendered when the template reaches the slot, after the content.
+        node = self.to_html_node()
+        if node is not None:
+            yield from node.iter_html()
@@ -0,0 +1,118 @@
+import http.server
+import io
+import os
+import threading
+import time
+from typing import Iterator
+
+RELOAD_PATH = "/__reload"
+RELOAD_SCRIPT = (
+    f'<script>new EventSource("{RELOAD_PATH}").onmessage = () => location.reload();</script>'
+).encode()
+
+
+def snapshot(paths: list[str]) -> dict[str, tuple[int, int]]:
+    state = {}
+    for path in paths:
+        if os.path.isfile(path):
+            st = os.stat(path)
+            state[path] = (st.st_mtime_ns, st.st_size)
+            continue
+        for root, _, files in os.walk(path):
+            for name in files:
+                file = os.path.join(root, name)
+                try:
+                    st = os.stat(file)
+                except FileNotFoundError:
+                    continue
+                state[file] = (st.st_mtime_ns, st.st_size)
+    return state
+
+
+def poll(paths: list[str], interval: float = 0.05) -> Iterator[tuple[set[str], set[str]]]:
+    state = snapshot(paths)
+    while True:
+        time.sleep(interval)
+        current = snapshot(paths)
+        if current == state:
+            continue
+        changed = {path for path, stat in current.items() if state.get(path) != stat}
+        removed = state.keys() - current.keys()
+        state = current
+        yield changed, removed
+
+
+class ReloadNotifier:
+    def __init__(self):
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, version: int, timeout: float) -> int:
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+class DevRequestHandler(http.server.SimpleHTTPRequestHandler):
+    notifier: ReloadNotifier
+
+    def do_GET(self):
+        if self.path == RELOAD_PATH:
+            self.send_events()
+            return
+        super().do_GET()
+
+    def send_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        version = self.notifier.version
+        try:
+            while True:
+                current = self.notifier.wait(version, timeout=15)
+                if current != version:
+                    self.wfile.write(b"data: reload\n\n")
+                    self.wfile.flush()
+                    return
+                self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and self.path.split("?", 1)[0].endswith("/"):
+            path = os.path.join(path, "index.html")
+        if not path.endswith(".html") or not os.path.isfile(path):
+            return super().send_head()
+
+        with open(path, "rb") as f:
+            body = f.read()
+        end = body.rfind(b"</body>")
+        if end == -1:
+            body += RELOAD_SCRIPT
+        else:
+            body = body[:end] + RELOAD_SCRIPT + body[end:]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        return io.BytesIO(body)
+
+
+def serve(directory: str, port: int, notifier: ReloadNotifier) -> http.server.ThreadingHTTPServer:
+    class Handler(DevRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=directory, **kwargs)
+
+    Handler.notifier = notifier
+    server = http.server.ThreadingHTTPServer(("", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server